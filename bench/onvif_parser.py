@@ -0,0 +1,171 @@
+"""Micro-benchmark of the ONVIF webhook payload parser.
+
+Compares the incremental rule-table parser (onvif.OnvifNotificationParser) with the XPath-based parsing it replaced
+in handle_webhook(), over the payloads in bench/payloads, and checks that both produce the same bus events.
+Run from the repository root, with reolink_ip installed (Home Assistant is not needed):
+
+    python bench/onvif_parser.py [--number N] [--repeat R] [--chunk BYTES]
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import timeit
+import types
+
+from xml.etree import ElementTree as XML
+
+from reolink_ip.api import (
+    MOTION_DETECTION_TYPE,
+    FACE_DETECTION_TYPE,
+    PERSON_DETECTION_TYPE,
+    VEHICLE_DETECTION_TYPE,
+    PET_DETECTION_TYPE,
+    VISITOR_DETECTION_TYPE
+)
+
+ROOT            = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPONENT       = os.path.join(ROOT, "custom_components", "reolink_cctv")
+PAYLOADS        = os.path.join(ROOT, "bench", "payloads")
+PACKAGE         = "reolink_cctv_bench"
+
+
+def _load(name: str) -> types.ModuleType:
+    """Load a module of the integration without its package's __init__ (which needs Home Assistant)."""
+    if PACKAGE not in sys.modules:
+        package             = types.ModuleType(PACKAGE)
+        package.__path__    = [COMPONENT]
+        sys.modules[PACKAGE] = package
+    spec    = importlib.util.spec_from_file_location(f"{PACKAGE}.{name}", os.path.join(COMPONENT, f"{name}.py"))
+    module  = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+#endof _load()
+
+
+const = _load("const")
+onvif = _load("onvif")
+
+
+##########################################################################################################################################################
+# Parsers
+##########################################################################################################################################################
+def parse_xpath(data: bytes) -> list[dict]:
+    """The parsing of handle_webhook() before the rule table: the whole tree, then one XPath search per message and rule."""
+    motion                      = None
+    face                        = None
+    person                      = None
+    vehicle                     = None
+    pet                         = None
+    motion_alarm                = None
+    visitor                     = None
+    motion_common_notification  = True
+
+    root = XML.fromstring(data.decode())
+    for message in root.iter('{http://docs.oasis-open.org/wsn/b-2}NotificationMessage'):
+        topic_element = message.find("{http://docs.oasis-open.org/wsn/b-2}Topic[@Dialect='http://www.onvif.org/ver10/tev/topicExpression/ConcreteSet']")
+        if topic_element is None:
+            continue
+        rule = os.path.basename(topic_element.text)
+        if not rule:
+            continue
+
+        if rule == "Motion":
+            data_element = message.find(".//{http://www.onvif.org/ver10/schema}SimpleItem[@Name='IsMotion']")
+            if data_element is None:
+                continue
+            if "Value" in data_element.attrib:
+                motion = data_element.attrib["Value"] == "true"
+        elif rule in ("FaceDetect", "PeopleDetect", "VehicleDetect", "DogCatDetect", "MotionAlarm", "Visitor"):
+            data_element = message.find(".//{http://www.onvif.org/ver10/schema}SimpleItem[@Name='State']")
+            if data_element is None:
+                continue
+            if "Value" in data_element.attrib:
+                state = data_element.attrib["Value"] == "true"
+                if rule == "FaceDetect":
+                    face = state
+                elif rule == "PeopleDetect":
+                    person = state
+                elif rule == "VehicleDetect":
+                    vehicle = state
+                elif rule == "DogCatDetect":
+                    pet = state
+                elif rule == "MotionAlarm":
+                    motion_alarm = state
+                else:
+                    visitor = state
+                if rule in ("FaceDetect", "PeopleDetect", "VehicleDetect", "DogCatDetect"):
+                    motion_common_notification = False
+
+    events = []
+    if motion is None:
+        motion = motion_alarm
+    if motion is not None:
+        events.append({const.MOTION_COMMON_TYPE if motion_common_notification else MOTION_DETECTION_TYPE: motion})
+    for event_type, state in ((FACE_DETECTION_TYPE, face), (PERSON_DETECTION_TYPE, person), (VEHICLE_DETECTION_TYPE, vehicle), (PET_DETECTION_TYPE, pet), (VISITOR_DETECTION_TYPE, visitor)):
+        if state is not None:
+            events.append({event_type: state})
+    return events
+#endof parse_xpath()
+
+
+def parse_rules(data: bytes, chunk: int = 0) -> list[dict]:
+    """The current parsing: the payload fed to the incremental parser, whole or chunk by chunk."""
+    parser = onvif.OnvifNotificationParser()
+    if chunk:
+        for offset in range(0, len(data), chunk):
+            parser.feed(data[offset:offset + chunk])
+    else:
+        parser.feed(data)
+    return parser.close()
+#endof parse_rules()
+
+
+##########################################################################################################################################################
+# Main
+##########################################################################################################################################################
+def main() -> int:
+    arguments = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    arguments.add_argument("--number", type = int, default = 5000, help = "parses per timing (default: 5000)")
+    arguments.add_argument("--repeat", type = int, default = 7, help = "timings, the best one is kept (default: 7)")
+    arguments.add_argument("--chunk", type = int, default = 97, help = "chunk size of the equivalence check (default: 97)")
+    options = arguments.parse_args()
+
+    failed  = False
+    totals  = {"events": 0, "xpath": 0.0, "rules": 0.0}
+    print(f"{'payload':24s} {'bytes':>6s} {'events':>6s} {'xpath ev/s':>11s} {'rules ev/s':>11s} {'speed-up':>8s}")
+    for name in sorted(os.listdir(PAYLOADS)):
+        with open(os.path.join(PAYLOADS, name), "rb") as file:
+            data = file.read()
+
+        expected = parse_xpath(data)
+        for chunk in (0, options.chunk):
+            events = parse_rules(data, chunk)
+            if events != expected:
+                print(f"{name}: the parsers differ (chunk {chunk}):\n  xpath: {expected}\n  rules: {events}")
+                failed = True
+
+        # The parsers timed in turn, so a slower period of the machine affects both alike; the best timing is kept.
+        timings = {"xpath": float("inf"), "rules": float("inf")}
+        for _ in range(options.repeat):
+            for label, parse in (("xpath", parse_xpath), ("rules", parse_rules)):
+                timings[label] = min(timings[label], timeit.timeit(lambda: parse(data), number = options.number) / options.number)
+        _print_row(name, len(data), len(expected), timings["xpath"], timings["rules"])
+        totals["events"]    += len(expected)
+        totals["xpath"]     += timings["xpath"]
+        totals["rules"]     += timings["rules"]
+
+    _print_row("all", None, totals["events"], totals["xpath"], totals["rules"])
+    return 1 if failed else 0
+#endof main()
+
+
+def _print_row(name: str, size: int, events: int, xpath: float, rules: float):
+    print(f"{name:24s} {size if size is not None else '':>6} {events:6d} {events / xpath:11.0f} {events / rules:11.0f} {xpath / rules:7.2f}x")
+#endof _print_row()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
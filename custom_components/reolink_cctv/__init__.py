@@ -7,10 +7,10 @@ from datetime import timedelta
 import async_timeout
 
 from homeassistant.config_entries               import ConfigEntry
-from homeassistant.core                         import HomeAssistant, Event
+from homeassistant.core                         import HomeAssistant
 from homeassistant.exceptions                   import ConfigEntryNotReady
 from homeassistant.helpers.storage              import STORAGE_DIR
-from homeassistant.helpers.update_coordinator   import DataUpdateCoordinator
+from homeassistant.helpers.update_coordinator   import DataUpdateCoordinator, UpdateFailed
 from homeassistant.const import (
     CONF_TIMEOUT,
     EVENT_HOMEASSISTANT_STOP,
@@ -24,18 +24,28 @@ from .const import (
     CONF_MOTION_OFF_DELAY,
     CONF_MOTION_FORCE_OFF,
     CONF_PLAYBACK_DAYS,
+    CONF_PLAYBACK_TODAY_FOLDER,
     CONF_PROTOCOL,
     CONF_STREAM,
     CONF_THUMBNAIL_PATH,
+    CONF_THUMBNAIL_QUOTA,
+    CONF_THUMBNAIL_CAMERA_QUOTA,
+    CONF_THUMBNAIL_GLOBAL_QUOTA,
     CONF_SUBSCRIPTION_WATCHDOG_INTERVAL,
+    CONF_SNAPSHOT_MAX_AGE,
     DEFAULT_EXTERNAL_HOST,
     DEFAULT_EXTERNAL_PORT,
     DEFAULT_PROTOCOL,
     DEFAULT_MOTION_FORCE_OFF,
     DEFAULT_MOTION_OFF_DELAY,
     DEFAULT_PLAYBACK_DAYS,
+    DEFAULT_PLAYBACK_TODAY_FOLDER,
+    DEFAULT_THUMBNAIL_QUOTA,
+    DEFAULT_THUMBNAIL_CAMERA_QUOTA,
+    DEFAULT_THUMBNAIL_GLOBAL_QUOTA,
     DEFAULT_STREAM,
     DEFAULT_SUBSCRIPTION_WATCHDOG_INTERVAL,
+    DEFAULT_SNAPSHOT_MAX_AGE,
     DEFAULT_TIMEOUT,
     DEVICE_CONFIG_UPDATE_COORDINATOR,
     SUBSCRIPTION_WATCHDOG_COORDINATOR,
@@ -45,10 +55,11 @@ from .const import (
     SERVICE_CLEANUP_THUMBNAILS,
     SERVICE_SET_DAYNIGHT,
     SERVICE_SET_SENSITIVITY,
+    SERVICE_BULK_SET,
+    SERVICE_NOTIFY_VIDEO_LINK,
     MOTION_WATCHDOG_TYPE
 )
 
-DEVICE_UPDATE_INTERVAL  = timedelta(minutes = 1)
 PLATFORMS               = ["camera", "switch", "binary_sensor", "sensor"]
 _LOGGER                 = logging.getLogger(__name__)
 
@@ -77,55 +88,114 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     hass.data.setdefault(DOMAIN, {})
 
-    host = ReolinkHost(hass, entry.data, entry.options)
-
-    try:
-        if not await host.init():
-            raise ConfigEntryNotReady(f"Error while trying to setup {host.api._host}:{host.api._port}: failed to obtain data from device.")
-    except Exception as e:
-        err = str(e)
-        if err:
-            raise ConfigEntryNotReady(f"Error while trying to setup {host.api._host}:{host.api._port}: \"{err}\".")
-        else:
-            raise ConfigEntryNotReady(f"Error while trying to setup {host.api._host}:{host.api._port}: failed to connect to device.")
+    host = ReolinkHost(hass, entry.data, entry.options, entry.entry_id)
+
+    # With the capabilities stored by a previous run, the entities are set up right away (unavailable until the device
+    # is connected), and the device is connected in the background: a slow or offline device does not hold the startup.
+    from_snapshot   = await host.async_load_capabilities()
+    start_lock      = asyncio.Lock()
+
+    async def async_start_host():
+        """Connect and initialize the device, fetch its states while subscribing, and revalidate the stored capabilities."""
+        async with start_lock:
+            if host.initialized:
+                return
+
+            try:
+                initialized = await host.async_timed("init", host.init())
+            except Exception as e:
+                err = str(e)
+                if err:
+                    raise ConfigEntryNotReady(f"Error while trying to setup {host.api._host}:{host.api._port}: \"{err}\".")
+                else:
+                    raise ConfigEntryNotReady(f"Error while trying to setup {host.api._host}:{host.api._port}: failed to connect to device.")
+            if not initialized:
+                raise ConfigEntryNotReady(f"Error while trying to setup {host.api._host}:{host.api._port}: failed to obtain data from device.")
+
+            # Fetch initial data so we have data when entities subscribe, while subscribing: both are independent device round-trips.
+            # (The coordinator's first refresh is not used, as its renew() would subscribe too, if the subscription is not done yet.)
+            results = await asyncio.gather(
+                host.async_timed("subscribe", host.subscribe()),
+                host.async_timed("states", host.update_states()),
+                return_exceptions = True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    _LOGGER.error("Error while setting up %s: %s", host.api.nvr_name, str(result) or type(result).__name__)
+
+            if await host.capabilities.async_revalidate() and from_snapshot:
+                # The entities got set up from capabilities which are not the device's anymore.
+                hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+    #endof async_start_host()
+
+    if not from_snapshot:
+        try:
+            await async_start_host()
+        except Exception:
+            # Home Assistant retries the setup with a new host: this one must release its session and the connection pool.
+            await host.stop()
+            raise
 
     host.sync_functions.append(entry.add_update_listener(entry_update_listener))
 
     hass.data[DOMAIN][entry.entry_id] = {HOST: host}
-    await host.subscribe()
 
     async def async_device_config_update():
-        """Perform the update of the host config-state cache, and renew the ONVIF-subscription."""
-        async with async_timeout.timeout(host.api.timeout):
-            await host.renew()
+        """Perform the update of the host config-state cache."""
+        if not host.initialized:
+            # Set up from the stored capabilities while the device was unreachable: try to connect it again.
+            try:
+                await async_start_host()
+            except ConfigEntryNotReady as e:
+                raise UpdateFailed(str(e)) from e
+            return
+
         async with async_timeout.timeout(host.api.timeout):
             await host.update_states() # Login session is implicitly updated here, so no need to explicitly do it in a timer
 
     coordinator_device_config_update = DataUpdateCoordinator(
         hass,
         _LOGGER,
-        name = "reolink.{}".format(host.api.nvr_name),
+        name = "reolink.{}".format(host.capabilities.nvr_name),
         update_method = async_device_config_update,
-        update_interval = DEVICE_UPDATE_INTERVAL
     )
-    # Fetch initial data so we have data when entities subscribe
-    await coordinator_device_config_update.async_refresh()
+
+    if from_snapshot:
+        async def async_start_host_in_background():
+            try:
+                await async_start_host()
+            except ConfigEntryNotReady as e:
+                _LOGGER.warning("%s Its entities are unavailable until it can be connected.", str(e))
+                return
+            except Exception as e:
+                _LOGGER.error("Error while starting %s: %s", host.capabilities.nvr_name, str(e) or type(e).__name__)
+                return
+            coordinator_device_config_update.async_set_updated_data(None)
+
+        hass.async_create_task(async_start_host_in_background())
+    else:
+        coordinator_device_config_update.async_set_updated_data(None)
     #await coordinator_device_config_update.async_config_entry_first_refresh()
 
+    async def async_renew():
+        """Renew the ONVIF-subscription."""
+        async with async_timeout.timeout(host.api.timeout):
+            await host.renew()
+
+    # The polling interval adapts to the activity, instead of a fixed one; the subscription renewal has its own timer.
+    host.poll_scheduler.async_start(coordinator_device_config_update, async_renew)
+
     async def async_subscription_watchdog():
         # Perform subscription state check.
-        if not host.api.subscribed:
+        if host.initialized and not host.api.subscribed:
             _LOGGER.info("WATCHDOG: No active subscription for host %s:%s. Force-refreshing motion states...", host.api.host, host.api.port)
-            for c in host.api.channels:
-                if c in host.sensor_motion_detection and host.sensor_motion_detection[c] is not None:
-                    async with async_timeout.timeout(host.api.timeout):
-                        host.sensor_motion_detection[c].handle_event(Event(host.event_id, {MOTION_WATCHDOG_TYPE: True}))
-            #hass.bus.async_fire(host.event_id, {MOTION_WATCHDOG_TYPE: True})
+            async with async_timeout.timeout(host.api.timeout):
+                await host.async_dispatch_events([{MOTION_WATCHDOG_TYPE: True}])
 
     coordinator_subscription_watchdog = DataUpdateCoordinator(
         hass,
         _LOGGER,
-        name = "reolink.{}.watchdog".format(host.api.nvr_name),
+        name = "reolink.{}.watchdog".format(host.capabilities.nvr_name),
         update_method = async_subscription_watchdog,
         update_interval = timedelta(seconds = host.subscription_watchdog_interval),
     )
@@ -137,8 +207,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data[DOMAIN][entry.entry_id][DEVICE_CONFIG_UPDATE_COORDINATOR]     = coordinator_device_config_update
     hass.data[DOMAIN][entry.entry_id][SUBSCRIPTION_WATCHDOG_COORDINATOR]    = coordinator_subscription_watchdog
 
-    for component in PLATFORMS:
-        hass.async_create_task(hass.config_entries.async_forward_entry_setup(entry, component))
+    # The platforms are set up concurrently, but within the entry's setup: an unload must find them all set up.
+    # (The work which can wait, like the first VoD searches, is deferred to Home Assistant's start by the entities.)
+    await host.async_timed("platforms", asyncio.gather(*[hass.config_entries.async_forward_entry_setup(entry, component) for component in PLATFORMS]))
+    host.log_startup_report()
 
     hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, host.stop)
 
@@ -155,13 +227,21 @@ async def entry_update_listener(hass: HomeAssistant, entry: ConfigEntry):
     """Update the configuration of the host entity."""
     host: ReolinkHost = hass.data[DOMAIN][entry.entry_id][HOST]
 
-    host.motion_off_delay   = entry.options.get(CONF_MOTION_OFF_DELAY, DEFAULT_MOTION_OFF_DELAY)
-    host.motion_force_off   = entry.options.get(CONF_MOTION_FORCE_OFF, DEFAULT_MOTION_FORCE_OFF)
-    host.playback_days      = entry.options.get(CONF_PLAYBACK_DAYS, DEFAULT_PLAYBACK_DAYS)
-    host.thumbnail_path     = hass.config.path(f"{STORAGE_DIR}/{DOMAIN}/{entry.unique_id}") if (CONF_THUMBNAIL_PATH not in entry.options or not entry.options[CONF_THUMBNAIL_PATH]) else entry.options[CONF_THUMBNAIL_PATH]
-    host.api.external_host  = entry.options.get(CONF_EXTERNAL_HOST, DEFAULT_EXTERNAL_HOST)
-    host.api.external_port  = entry.options.get(CONF_EXTERNAL_PORT, DEFAULT_EXTERNAL_PORT)
-    host.api.timeout        = entry.options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT)
+    host.motion_off_delay       = entry.options.get(CONF_MOTION_OFF_DELAY, DEFAULT_MOTION_OFF_DELAY)
+    host.motion_force_off       = entry.options.get(CONF_MOTION_FORCE_OFF, DEFAULT_MOTION_FORCE_OFF)
+    host.playback_days          = entry.options.get(CONF_PLAYBACK_DAYS, DEFAULT_PLAYBACK_DAYS)
+    host.playback_today_folder  = entry.options.get(CONF_PLAYBACK_TODAY_FOLDER, DEFAULT_PLAYBACK_TODAY_FOLDER)
+    host.thumbnail_path         = hass.config.path(f"{STORAGE_DIR}/{DOMAIN}/{entry.unique_id}") if (CONF_THUMBNAIL_PATH not in entry.options or not entry.options[CONF_THUMBNAIL_PATH]) else entry.options[CONF_THUMBNAIL_PATH]
+    host.thumbnail_quota        = entry.options.get(CONF_THUMBNAIL_QUOTA, DEFAULT_THUMBNAIL_QUOTA)
+    host.thumbnail_camera_quota = entry.options.get(CONF_THUMBNAIL_CAMERA_QUOTA, DEFAULT_THUMBNAIL_CAMERA_QUOTA)
+    host.thumbnail_global_quota = entry.options.get(CONF_THUMBNAIL_GLOBAL_QUOTA, DEFAULT_THUMBNAIL_GLOBAL_QUOTA)
+    host.snapshot_max_age       = entry.options.get(CONF_SNAPSHOT_MAX_AGE, DEFAULT_SNAPSHOT_MAX_AGE)
+    host.api.external_host      = entry.options.get(CONF_EXTERNAL_HOST, DEFAULT_EXTERNAL_HOST)
+    host.api.external_port      = entry.options.get(CONF_EXTERNAL_PORT, DEFAULT_EXTERNAL_PORT)
+    host.api.timeout            = entry.options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT)
+    host.async_clear_vod_sources()
+
+    hass.async_create_task(host.thumbnails.async_enforce_quotas())
 
     cur_protocol            = entry.options.get(CONF_PROTOCOL, DEFAULT_PROTOCOL)
     cur_stream              = entry.options.get(CONF_STREAM, DEFAULT_STREAM)
@@ -183,6 +263,10 @@ async def entry_update_listener(hass: HomeAssistant, entry: ConfigEntry):
             _LOGGER.debug("ONVIF-subscription watchdog interval changed to %s seconds.", coordinator_subscription_watchdog.update_interval.seconds)
         await coordinator_subscription_watchdog.async_refresh()
 
+    if not host.initialized:
+        # The device's network ports are checked by its initialization.
+        return
+
     if not host.api.rtmp_enabled and host.api.protocol == "rtmp":
         _LOGGER.info("RTMP is disabled on %s, trying to enable it...", host.api.nvr_name)
         if not await host.api.set_net_port(enable_rtmp = True):
@@ -220,6 +304,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
         hass.services.async_remove(DOMAIN, SERVICE_SET_BACKLIGHT)
         hass.services.async_remove(DOMAIN, SERVICE_PTZ_CONTROL)
         hass.services.async_remove(DOMAIN, SERVICE_CLEANUP_THUMBNAILS)
+        hass.services.async_remove(DOMAIN, SERVICE_BULK_SET)
+        hass.services.async_remove(DOMAIN, SERVICE_NOTIFY_VIDEO_LINK)
 
     return unload_ok
 #endof async_unload_entry()
@@ -2,7 +2,7 @@
 import datetime
 import logging
 
-from homeassistant.core                     import HomeAssistant, Event
+from homeassistant.core                     import HomeAssistant, Event, callback
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.helpers.event            import async_track_point_in_utc_time
 from homeassistant.util                     import dt
@@ -39,33 +39,33 @@ async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices
     host: ReolinkHost = hass.data[DOMAIN][config_entry.entry_id][HOST]
 
     new_sensors = []
-    for c in host.api.channels:
+    for c in host.capabilities.channels:
         host.sensor_motion_detection[c] = MotionSensor(hass, config_entry, c)
         new_sensors.append(host.sensor_motion_detection[c])
 
-        if host.api.is_ia_enabled(c):
-            _LOGGER.debug("Camera %s (channel %s, device model %s) is AI-enabled so object detection sensors will be created.", host.api.camera_name(c), c, host.api.camera_model(c))
+        if host.capabilities.is_ia_enabled(c):
+            _LOGGER.debug("Camera %s (channel %s, device model %s) is AI-enabled so object detection sensors will be created.", host.capabilities.camera_name(c), c, host.capabilities.camera_model(c))
 
-            if host.api.ai_supported(c, FACE_DETECTION_TYPE):
+            if host.capabilities.ai_supported(c, FACE_DETECTION_TYPE):
                 host.sensor_face_detection[c]       = ObjectDetectedSensor(hass, config_entry, FACE_DETECTION_TYPE, c)
                 new_sensors.append(host.sensor_face_detection[c])
-            if host.api.ai_supported(c, PERSON_DETECTION_TYPE):
+            if host.capabilities.ai_supported(c, PERSON_DETECTION_TYPE):
                 host.sensor_person_detection[c]     = ObjectDetectedSensor(hass, config_entry, PERSON_DETECTION_TYPE, c)
                 new_sensors.append(host.sensor_person_detection[c])
-            if host.api.ai_supported(c, VEHICLE_DETECTION_TYPE):
+            if host.capabilities.ai_supported(c, VEHICLE_DETECTION_TYPE):
                 host.sensor_vehicle_detection[c]    = ObjectDetectedSensor(hass, config_entry, VEHICLE_DETECTION_TYPE, c)
                 new_sensors.append(host.sensor_vehicle_detection[c])
-            if host.api.ai_supported(c, PET_DETECTION_TYPE):
+            if host.capabilities.ai_supported(c, PET_DETECTION_TYPE):
                 host.sensor_pet_detection[c]        = ObjectDetectedSensor(hass, config_entry, PET_DETECTION_TYPE, c)
                 new_sensors.append(host.sensor_pet_detection[c])
 
-        if host.api.is_doorbell_enabled(c):
-            _LOGGER.debug("Camera %s (channel %s, device model %s) supports doorbell so visitor sensors will be created.", host.api.camera_name(c), c, host.api.camera_model(c))
+        if host.capabilities.is_doorbell_enabled(c):
+            _LOGGER.debug("Camera %s (channel %s, device model %s) supports doorbell so visitor sensors will be created.", host.capabilities.camera_name(c), c, host.capabilities.camera_model(c))
 
             host.sensor_visitor_detection[c] = VisitorSensor(hass, config_entry, c)
             new_sensors.append(host.sensor_visitor_detection[c])
 
-    async_add_devices(new_sensors, update_before_add = True)
+    async_add_devices(new_sensors, update_before_add = host.initialized)
 #endof async_setup_entry()
 
 
@@ -84,7 +84,8 @@ class ReolinkBinarySensorEntity(BinarySensorEntity):
     #endof __init__()
 
 
-    async def register_clear_callback(self):
+    @callback
+    def register_clear_callback(self):
         if self._state:
             if self._host.motion_force_off > 0:
                 async def scheduled_clear(now):
@@ -124,7 +125,7 @@ class MotionSensor(ReolinkCoordinatorEntity, ReolinkBinarySensorEntity):
         self._channel: int      = channel
         self._last_motion_time  = datetime.datetime.min
         self._unique_id         = f"reolink_motion_{self._host.unique_id}_{self._channel}"
-        self._name              = f"{self._host.api.camera_name(channel)} motion"
+        self._name              = f"{self._host.capabilities.camera_name(channel)} motion"
     #endof __init__()
 
 
@@ -185,7 +186,8 @@ class MotionSensor(ReolinkCoordinatorEntity, ReolinkBinarySensorEntity):
     async def async_added_to_hass(self) -> None:
         """Entity created."""
         await super().async_added_to_hass()
-        self.hass.bus.async_listen(self._host.event_id, self.handle_event)
+        for event_type in (MOTION_DETECTION_TYPE, MOTION_COMMON_TYPE, MOTION_WATCHDOG_TYPE):
+            self.async_on_remove(self._host.async_add_event_listener(event_type, self._channel, self.handle_event))
     #endof async_added_to_hass()
 
 
@@ -218,7 +220,7 @@ class MotionSensor(ReolinkCoordinatorEntity, ReolinkBinarySensorEntity):
             _LOGGER.info("COMMON-MOTION received %s: %s", motion_common_event_state, self._host.api.camera_name(self._channel))
 
             if motion_common_event_state:
-                await self._host.api.get_all_motion_states(self._channel)
+                await self._host.async_refresh_motion_states()
                 if self._host.api.is_nvr:
                     self._state = self._host.api.motion_detected(self._channel)
                 else:
@@ -230,24 +232,16 @@ class MotionSensor(ReolinkCoordinatorEntity, ReolinkBinarySensorEntity):
                 _LOGGER.info("MOTION TRIGGERED: %s", self._host.api.camera_name(self._channel))
                 self._last_motion_time = datetime.datetime.now()
 
-            self.async_schedule_update_ha_state()
-            #await self.async_write_ha_state()
+            self._host.async_schedule_state_write(self)
 
             if self._host.api.is_ia_enabled(self._channel):
-                if self._channel in self._host.sensor_face_detection and self._host.sensor_face_detection[self._channel]:
-                    await self._host.sensor_face_detection[self._channel].handle_event(Event(self._host.event_id, {"ai_refresh": motion_common_event_state}))
-                if self._channel in self._host.sensor_person_detection and self._host.sensor_person_detection[self._channel]:
-                    await self._host.sensor_person_detection[self._channel].handle_event(Event(self._host.event_id, {"ai_refresh": motion_common_event_state}))
-                if self._channel in self._host.sensor_vehicle_detection and self._host.sensor_vehicle_detection[self._channel]:
-                    await self._host.sensor_vehicle_detection[self._channel].handle_event(Event(self._host.event_id, {"ai_refresh": motion_common_event_state}))
-                if self._channel in self._host.sensor_pet_detection and self._host.sensor_pet_detection[self._channel]:
-                    await self._host.sensor_pet_detection[self._channel].handle_event(Event(self._host.event_id, {"ai_refresh": motion_common_event_state}))
+                self.refresh_ai_sensors(motion_common_event_state)
         elif motion_event_state is not None:
             _LOGGER.info("MOTION received %s: %s", motion_event_state, self._host.api.camera_name(self._channel))
 
             if self._host.api.is_nvr:
                 if motion_event_state:
-                    await self._host.api.get_motion_state(self._channel)
+                    await self._host.async_refresh_motion_states()
                     self._state = self._host.api.motion_detected(self._channel)
                 else:
                     self._state = False
@@ -258,33 +252,34 @@ class MotionSensor(ReolinkCoordinatorEntity, ReolinkBinarySensorEntity):
                 _LOGGER.info("MOTION TRIGGERED: %s", self._host.api.camera_name(self._channel))
                 self._last_motion_time = datetime.datetime.now()
 
-            self.async_schedule_update_ha_state()
-            #await self.async_write_ha_state()
+            self._host.async_schedule_state_write(self)
         elif motion_watchdog_event_state is not None:
             _LOGGER.info("WATCHDOG-MOTION received %s: %s", motion_watchdog_event_state, self._host.api.camera_name(self._channel))
 
-            await self._host.api.get_all_motion_states(self._channel)
+            await self._host.async_refresh_motion_states()
             self._state = self._host.api.motion_detected(self._channel)
 
             if self._state:
                 _LOGGER.info("MOTION TRIGGERED: %s", self._host.api.camera_name(self._channel))
                 self._last_motion_time = datetime.datetime.now()
 
-            self.async_schedule_update_ha_state()
-            #await self.async_write_ha_state()
+            self._host.async_schedule_state_write(self)
 
             if motion_watchdog_event_state and self._host.api.is_ia_enabled(self._channel):
-                if self._channel in self._host.sensor_face_detection and self._host.sensor_face_detection[self._channel]:
-                    await self._host.sensor_face_detection[self._channel].handle_event(Event(self._host.event_id, {"ai_refresh": motion_watchdog_event_state}))
-                if self._channel in self._host.sensor_person_detection and self._host.sensor_person_detection[self._channel]:
-                    await self._host.sensor_person_detection[self._channel].handle_event(Event(self._host.event_id, {"ai_refresh": motion_watchdog_event_state}))
-                if self._channel in self._host.sensor_vehicle_detection and self._host.sensor_vehicle_detection[self._channel]:
-                    await self._host.sensor_vehicle_detection[self._channel].handle_event(Event(self._host.event_id, {"ai_refresh": motion_watchdog_event_state}))
-                if self._channel in self._host.sensor_pet_detection and self._host.sensor_pet_detection[self._channel]:
-                    await self._host.sensor_pet_detection[self._channel].handle_event(Event(self._host.event_id, {"ai_refresh": motion_watchdog_event_state}))
-
-        await self.register_clear_callback()
+                self.refresh_ai_sensors(motion_watchdog_event_state)
+
+        self.register_clear_callback()
     #endof handle_event()
+
+
+    @callback
+    def refresh_ai_sensors(self, detected: bool):
+        """Update all AI sensors of the channel in one pass, from the AI states already obtained with the motion states."""
+        for sensors in (self._host.sensor_face_detection, self._host.sensor_person_detection, self._host.sensor_vehicle_detection, self._host.sensor_pet_detection):
+            sensor = sensors.get(self._channel)
+            if sensor is not None:
+                sensor.handle_ai_refresh(detected)
+    #endof refresh_ai_sensors()
 #endof class MotionSensor
 
 
@@ -302,7 +297,7 @@ class ObjectDetectedSensor(ReolinkCoordinatorEntity, ReolinkBinarySensorEntity):
         self._object_type               = object_type
         self._last_motion_time          = datetime.datetime.min
         self._unique_id                 = f"reolink_object_{object_type}_detected_{self._host.unique_id}_{channel}"
-        self._name                      = f"{self._host.api.camera_name(channel)} {object_type} detected"
+        self._name                      = f"{self._host.capabilities.camera_name(channel)} {object_type} detected"
     #endof __init__()
 
     ##############################################################################
@@ -368,7 +363,7 @@ class ObjectDetectedSensor(ReolinkCoordinatorEntity, ReolinkBinarySensorEntity):
     async def async_added_to_hass(self) -> None:
         """Entity created."""
         await super().async_added_to_hass()
-        self.hass.bus.async_listen(self._host.event_id, self.handle_event)
+        self.async_on_remove(self._host.async_add_event_listener(self._object_type, self._channel, self.handle_event))
 
 
     ##############################################################################
@@ -378,12 +373,9 @@ class ObjectDetectedSensor(ReolinkCoordinatorEntity, ReolinkBinarySensorEntity):
         if not self.hass or not self.enabled:
             return
 
-        ai_refresh_event_state      = None
         event_state                 = None
         motion_watchdog_event_state = None
-        if "ai_refresh" in event.data:
-            ai_refresh_event_state = event.data["ai_refresh"]
-        elif self._object_type in event.data:
+        if self._object_type in event.data:
             event_state = event.data[self._object_type]
         elif MOTION_WATCHDOG_TYPE in event.data:
             motion_watchdog_event_state = event.data[MOTION_WATCHDOG_TYPE]
@@ -392,15 +384,10 @@ class ObjectDetectedSensor(ReolinkCoordinatorEntity, ReolinkBinarySensorEntity):
         else:
             return
 
-        if ai_refresh_event_state is not None:
-            if ai_refresh_event_state:
-                self._state = self._host.api.ai_detected(self._channel, self._object_type)
-            else:
-                self._state = False
-        elif motion_watchdog_event_state is not None:
+        if motion_watchdog_event_state is not None:
             _LOGGER.info("WATCHDOG-AI received %s: %s:%s", motion_watchdog_event_state, self._host.api.camera_name(self._channel), self._object_type)
 
-            await self._host.api.get_ai_state(self._channel)
+            await self._host.async_refresh_motion_states()
             self._state = self._host.api.ai_detected(self._channel, self._object_type)
         else:
             _LOGGER.info("MOTION-AI received %s: %s:%s", event_state, self._host.api.camera_name(self._channel), self._object_type)
@@ -409,15 +396,31 @@ class ObjectDetectedSensor(ReolinkCoordinatorEntity, ReolinkBinarySensorEntity):
             else:
                 self._state = event_state
 
+        self._update_state()
+    #endof handle_event()
+
+
+    @callback
+    def handle_ai_refresh(self, detected: bool):
+        """Update the state from the AI states of the channel, refreshed by its motion sensor: no device requests here."""
+        if not self.hass or not self.enabled:
+            return
+
+        self._state = self._host.api.ai_detected(self._channel, self._object_type) if detected else False
+        self._update_state()
+    #endof handle_ai_refresh()
+
+
+    @callback
+    def _update_state(self):
         if self._state:
             _LOGGER.info("MOTION-AI TRIGGERED: %s:%s", self._host.api.camera_name(self._channel), self._object_type)
             self._last_motion_time = datetime.datetime.now()
 
-        self.async_schedule_update_ha_state()
-        #await self.async_write_ha_state()
+        self._host.async_schedule_state_write(self)
 
-        await self.register_clear_callback()
-    #endof handle_event()
+        self.register_clear_callback()
+    #endof _update_state()
 #endof class ObjectDetectedSensor
 
 
@@ -434,7 +437,7 @@ class VisitorSensor(ReolinkCoordinatorEntity, ReolinkBinarySensorEntity):
         self._channel: int          = channel
         self._last_detection_time   = datetime.datetime.min
         self._unique_id             = f"reolink_visitor_{self._host.unique_id}_{self._channel}"
-        self._name                  = f"{self._host.api.camera_name(channel)} visitor"
+        self._name                  = f"{self._host.capabilities.camera_name(channel)} visitor"
     #endof __init__()
 
 
@@ -491,7 +494,7 @@ class VisitorSensor(ReolinkCoordinatorEntity, ReolinkBinarySensorEntity):
     async def async_added_to_hass(self) -> None:
         """Entity created."""
         await super().async_added_to_hass()
-        self.hass.bus.async_listen(self._host.event_id, self.handle_event)
+        self.async_on_remove(self._host.async_add_event_listener(VISITOR_DETECTION_TYPE, self._channel, self.handle_event))
     #endof async_added_to_hass()
 
 
@@ -523,9 +526,8 @@ class VisitorSensor(ReolinkCoordinatorEntity, ReolinkBinarySensorEntity):
                 _LOGGER.info("VISITOR TRIGGERED: %s", self._host.api.camera_name(self._channel))
                 self._last_detection_time = datetime.datetime.now()
 
-            self.async_schedule_update_ha_state()
-            #await self.async_write_ha_state()
+            self._host.async_schedule_state_write(self)
 
-        await self.register_clear_callback()
+        self.register_clear_callback()
     #endof handle_event()
 #endof class VisitorSensor
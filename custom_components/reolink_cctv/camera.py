@@ -86,7 +86,7 @@ async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices
     host: ReolinkHost = hass.data[DOMAIN][config_entry.entry_id][HOST]
 
     cameras = []
-    for channel in host.api.channels:
+    for channel in host.capabilities.channels:
         streams = ["sub", "main", "snapshots"]
         if host.api.protocol == "rtmp":
             streams.append("ext")
@@ -94,7 +94,7 @@ async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices
         for stream in streams:
             cameras.append(ReolinkCamera(hass, config_entry, channel, stream))
 
-    async_add_devices(cameras, update_before_add = True)
+    async_add_devices(cameras, update_before_add = host.initialized)
 #endof async_setup_entry()
 
 
@@ -104,6 +104,9 @@ async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices
 class ReolinkCamera(ReolinkCoordinatorEntity, Camera):
     """An implementation of a Reolink IP camera."""
 
+    # Day/night and backlight (ISP), PTZ presets, motion sensitivity (alarm), and the channel's name (OSD).
+    state_commands = ("GetIsp", "GetPtzPreset", "GetAlarm", "GetOsd")
+
     def __init__(self, hass, config, channel, stream):
         ReolinkCoordinatorEntity.__init__(self, hass, config)
         Camera.__init__(self)
@@ -115,7 +118,7 @@ class ReolinkCamera(ReolinkCoordinatorEntity, Camera):
         self._stream    = stream
         self._ffmpeg    = self._hass.data[DATA_FFMPEG]
 
-        self._attr_name                             = f"{self._host.api.camera_name(self._channel)} {self._stream}"
+        self._attr_name                             = f"{self._host.capabilities.camera_name(self._channel)} {self._stream}"
         self._attr_unique_id                        = f"reolink_camera_{self._host.unique_id}_{self._channel}_{self._stream}"
         self._attr_entity_registry_enabled_default  = stream == "sub"
 
@@ -151,13 +154,13 @@ class ReolinkCamera(ReolinkCoordinatorEntity, Camera):
 
     @property
     def ptz_supported(self):
-        return self._host.api.ptz_supported(self._channel)
+        return self._host.capabilities.ptz_supported(self._channel)
 
 
     @property
     def playback_support(self):
         """ Return whethere the camera has VoDs. """
-        return self._host.api.hdd_info is not None
+        return self._host.capabilities.playback_support
 
 
     @property
@@ -171,7 +174,7 @@ class ReolinkCamera(ReolinkCoordinatorEntity, Camera):
         if attrs is None:
             attrs = {}
 
-        if self._host.api.ptz_supported(self._channel):
+        if self._host.capabilities.ptz_supported(self._channel):
             attrs["ptz_presets"] = self._host.api.ptz_presets(self._channel)
 
         for key, value in self._backlight_modes.items():
@@ -216,7 +219,7 @@ class ReolinkCamera(ReolinkCoordinatorEntity, Camera):
 
     async def async_camera_image(self, width: Union[int, None] = None, height: Union[int, None] = None) -> Union[bytes, None]:
         """Return a still image response from the camera."""
-        return await self._host.api.get_snapshot(self._channel)
+        return await self._host.async_get_snapshot(self._channel, width, height)
     #endof async_camera_image()
 
 
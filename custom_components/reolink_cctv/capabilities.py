@@ -0,0 +1,189 @@
+"""Persisted snapshot of the capabilities of a Reolink host."""
+
+import asyncio
+import logging
+
+from typing import Optional
+
+from homeassistant.core             import HomeAssistant
+from homeassistant.helpers.storage  import Store
+
+from reolink_ip.api import (
+    FACE_DETECTION_TYPE,
+    PERSON_DETECTION_TYPE,
+    VEHICLE_DETECTION_TYPE,
+    PET_DETECTION_TYPE,
+)
+
+from .const import CAPABILITIES_STORAGE_KEY
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+AI_TYPES        = (FACE_DETECTION_TYPE, PERSON_DETECTION_TYPE, VEHICLE_DETECTION_TYPE, PET_DETECTION_TYPE)
+
+
+##########################################################################################################################################################
+# Capabilities class
+##########################################################################################################################################################
+class ReolinkCapabilities:
+    """What the device has, as last seen: channels, names, and the support of AI, doorbell, switches, PTZ and playback.
+
+    The snapshot is stored per config entry, so the entities can be created at startup without asking the device
+    (which might be slow or offline), and it is revalidated against the device once it got connected.
+    The entities' set is taken from the snapshot when there is one; names and versions are the live ones when known.
+    """
+
+    def __init__(self, hass: HomeAssistant, host, entry_id: str):
+        self._host                      = host
+        self._store                     = Store(hass, STORAGE_VERSION, CAPABILITIES_STORAGE_KEY.format(entry_id = entry_id))
+        self._data: Optional[dict]      = None
+    #endof __init__()
+
+
+    async def async_load(self) -> bool:
+        """Load the stored snapshot. Returns whether there is one."""
+        data = await self._store.async_load()
+        self._data = data if isinstance(data, dict) and data.get("channels") is not None else None
+        return self._data is not None
+    #endof async_load()
+
+
+    async def async_revalidate(self) -> bool:
+        """Take a new snapshot from the (connected) device, and store it if it changed. Returns whether it changed."""
+        api         = self._host.api
+        cameras     = dict()
+        # One device round-trip per channel: all sent at once.
+        switches    = await asyncio.gather(*[api.get_switchable_capabilities(c) for c in api.channels])
+        for c, channel_switches in zip(api.channels, switches):
+            cameras[str(c)] = {
+                "name":         api.camera_name(c),
+                "model":        api.camera_model(c),
+                "ia":           bool(api.is_ia_enabled(c)),
+                "ai":           [t for t in AI_TYPES if api.ai_supported(c, t)],
+                "doorbell":     bool(api.is_doorbell_enabled(c)),
+                "ptz":          bool(api.ptz_supported(c)),
+                "switches":     channel_switches,
+            }
+
+        data = {
+            "unique_id":        self._host.unique_id,
+            "name":             api.nvr_name,
+            "is_nvr":           api.is_nvr,
+            "model":            api.model,
+            "mac_address":      api.mac_address,
+            "hw_version":       api.hardware_version,
+            "sw_version":       api.sw_version,
+            "hdd":              api.hdd_info is not None,
+            "channels":         list(api.channels),
+            "cameras":          cameras,
+        }
+
+        if data == self._data:
+            return False
+
+        changed     = self._data is not None
+        self._data  = data
+        await self._store.async_save(data)
+        if changed:
+            _LOGGER.info("The capabilities of %s changed since they were stored.", api.nvr_name)
+        return changed
+    #endof async_revalidate()
+
+
+    ##############################################################################
+    # Entities' set: from the snapshot when there is one
+    @property
+    def unique_id(self) -> Optional[str]:
+        return self._data["unique_id"] if self._data is not None else None
+
+    @property
+    def channels(self) -> list[int]:
+        return self._data["channels"] if self._data is not None else self._host.api.channels
+
+    @property
+    def playback_support(self) -> bool:
+        return self._data["hdd"] if self._data is not None else self._host.api.hdd_info is not None
+
+    def is_ia_enabled(self, channel: int) -> bool:
+        camera = self._camera(channel)
+        return camera["ia"] if camera is not None else self._host.api.is_ia_enabled(channel)
+
+    def ai_supported(self, channel: int, object_type: str) -> bool:
+        camera = self._camera(channel)
+        return object_type in camera["ai"] if camera is not None else self._host.api.ai_supported(channel, object_type)
+
+    def is_doorbell_enabled(self, channel: int) -> bool:
+        camera = self._camera(channel)
+        return camera["doorbell"] if camera is not None else self._host.api.is_doorbell_enabled(channel)
+
+    def ptz_supported(self, channel: int) -> bool:
+        camera = self._camera(channel)
+        return camera["ptz"] if camera is not None else self._host.api.ptz_supported(channel)
+
+    async def async_get_switchable_capabilities(self, channel: int) -> list[str]:
+        camera = self._camera(channel)
+        return camera["switches"] if camera is not None else await self._host.api.get_switchable_capabilities(channel)
+
+
+    ##############################################################################
+    # Descriptions: live when the device is connected
+    @property
+    def nvr_name(self) -> Optional[str]:
+        return self._live("nvr_name", "name")
+
+    @property
+    def is_nvr(self) -> bool:
+        return self._live("is_nvr", "is_nvr")
+
+    @property
+    def model(self) -> Optional[str]:
+        return self._live("model", "model")
+
+    @property
+    def mac_address(self) -> Optional[str]:
+        return self._live("mac_address", "mac_address")
+
+    @property
+    def hardware_version(self) -> Optional[str]:
+        return self._live("hardware_version", "hw_version")
+
+    @property
+    def sw_version(self) -> Optional[str]:
+        return self._live("sw_version", "sw_version")
+
+    @property
+    def manufacturer(self) -> str:
+        return self._host.api.manufacturer
+
+    def camera_name(self, channel: int) -> Optional[str]:
+        camera = self._camera(channel)
+        if self._connected or camera is None:
+            return self._host.api.camera_name(channel)
+        return camera["name"]
+
+    def camera_model(self, channel: int) -> Optional[str]:
+        camera = self._camera(channel)
+        if self._connected or camera is None:
+            return self._host.api.camera_model(channel)
+        return camera["model"]
+
+
+    ##############################################################################
+    # Internals
+    @property
+    def _connected(self) -> bool:
+        """Whether the device's data got obtained."""
+        return self._host.api.mac_address is not None
+
+
+    def _camera(self, channel: int) -> Optional[dict]:
+        return self._data["cameras"].get(str(channel)) if self._data is not None else None
+
+
+    def _live(self, attribute: str, key: str):
+        if self._connected or self._data is None:
+            return getattr(self._host.api, attribute)
+        return self._data.get(key)
+#endof class ReolinkCapabilities
@@ -24,19 +24,29 @@ from .const import (
     CONF_MOTION_OFF_DELAY,
     CONF_MOTION_FORCE_OFF,
     CONF_PLAYBACK_DAYS,
+    CONF_PLAYBACK_TODAY_FOLDER,
     CONF_PROTOCOL,
     CONF_STREAM,
     CONF_THUMBNAIL_PATH,
+    CONF_THUMBNAIL_QUOTA,
+    CONF_THUMBNAIL_CAMERA_QUOTA,
+    CONF_THUMBNAIL_GLOBAL_QUOTA,
     CONF_SUBSCRIPTION_WATCHDOG_INTERVAL,
+    CONF_SNAPSHOT_MAX_AGE,
     DEFAULT_EXTERNAL_HOST,
     DEFAULT_EXTERNAL_PORT,
     DEFAULT_MOTION_OFF_DELAY,
     DEFAULT_MOTION_FORCE_OFF,
     DEFAULT_PLAYBACK_DAYS,
+    DEFAULT_PLAYBACK_TODAY_FOLDER,
+    DEFAULT_THUMBNAIL_QUOTA,
+    DEFAULT_THUMBNAIL_CAMERA_QUOTA,
+    DEFAULT_THUMBNAIL_GLOBAL_QUOTA,
     DEFAULT_PROTOCOL,
     DEFAULT_STREAM,
     DEFAULT_TIMEOUT,
     DEFAULT_SUBSCRIPTION_WATCHDOG_INTERVAL,
+    DEFAULT_SNAPSHOT_MAX_AGE,
     DOMAIN
 )
 
@@ -195,16 +205,41 @@ class ReolinkOptionsFlowHandler(config_entries.OptionsFlow):
                         default = self.config_entry.options.get(CONF_SUBSCRIPTION_WATCHDOG_INTERVAL, DEFAULT_SUBSCRIPTION_WATCHDOG_INTERVAL),
                     ): vol.All(vol.Coerce(int), vol.Range(min = 0, max = 180)),
 
+                    vol.Required(
+                        CONF_SNAPSHOT_MAX_AGE,
+                        default = self.config_entry.options.get(CONF_SNAPSHOT_MAX_AGE, DEFAULT_SNAPSHOT_MAX_AGE),
+                    ): vol.All(vol.Coerce(float), vol.Range(min = 0, max = 60)),
+
                     vol.Required(
                         CONF_PLAYBACK_DAYS,
                         default = self.config_entry.options.get(CONF_PLAYBACK_DAYS, DEFAULT_PLAYBACK_DAYS),
                     ): cv.positive_int,
 
+                    vol.Required(
+                        CONF_PLAYBACK_TODAY_FOLDER,
+                        default = self.config_entry.options.get(CONF_PLAYBACK_TODAY_FOLDER, DEFAULT_PLAYBACK_TODAY_FOLDER),
+                    ): bool,
+
                     vol.Optional(
                         CONF_THUMBNAIL_PATH,
                         default = self.config_entry.options.get(CONF_THUMBNAIL_PATH, default_thumbnail_path),
                     ): cv.string,
 
+                    vol.Required(
+                        CONF_THUMBNAIL_QUOTA,
+                        default = self.config_entry.options.get(CONF_THUMBNAIL_QUOTA, DEFAULT_THUMBNAIL_QUOTA),
+                    ): cv.positive_int,
+
+                    vol.Required(
+                        CONF_THUMBNAIL_CAMERA_QUOTA,
+                        default = self.config_entry.options.get(CONF_THUMBNAIL_CAMERA_QUOTA, DEFAULT_THUMBNAIL_CAMERA_QUOTA),
+                    ): cv.positive_int,
+
+                    vol.Required(
+                        CONF_THUMBNAIL_GLOBAL_QUOTA,
+                        default = self.config_entry.options.get(CONF_THUMBNAIL_GLOBAL_QUOTA, DEFAULT_THUMBNAIL_GLOBAL_QUOTA),
+                    ): cv.positive_int,
+
                     vol.Optional(
                         CONF_TIMEOUT,
                         default = self.config_entry.options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT),
@@ -0,0 +1,179 @@
+"""HTTP connection pool shared by all the Reolink hosts."""
+
+import logging
+import ssl
+
+from types  import SimpleNamespace
+from typing import Optional
+
+import aiohttp
+
+from homeassistant.const                    import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core                     import HomeAssistant, Event, callback
+from homeassistant.helpers.aiohttp_client   import SERVER_SOFTWARE
+
+from .const import DOMAIN_DATA, CONNECTION_POOL
+
+_LOGGER = logging.getLogger(__name__)
+
+POOL_LIMIT              = 100
+POOL_LIMIT_PER_HOST     = 4
+POOL_KEEPALIVE_TIMEOUT  = 30
+POOL_DNS_CACHE_TTL      = 300
+
+COUNTERS                = ("requests", "connections", "handshakes", "reused", "queued")
+
+
+##########################################################################################################################################################
+# Connection pool class
+##########################################################################################################################################################
+class ReolinkConnectionPool:
+    """One tuned TCP connector and client session for all the hosts of the integration.
+
+    Connections are kept alive between the commands, so a host pays for a TLS handshake once rather than after each
+    session re-creation, DNS lookups are cached, and the SSL context (accepting the devices' self-signed certificates)
+    is created once. Connection counters are collected per device through an aiohttp trace config.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass                                          = hass
+        self._users: set                                    = set()
+        self._connector: Optional[aiohttp.TCPConnector]     = None
+        self._session: Optional[aiohttp.ClientSession]      = None
+        self._metrics: dict[str, dict[str, int]]            = dict()
+
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.set_ciphers("DEFAULT")
+        context.check_hostname  = False
+        context.verify_mode     = ssl.CERT_NONE
+        self._ssl_context       = context
+
+        self._trace_config = aiohttp.TraceConfig(trace_config_ctx_factory = self._trace_context)
+        self._trace_config.on_request_start.append(self._on_request_start)
+        self._trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        self._trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        self._trace_config.on_connection_queued_start.append(self._on_connection_queued_start)
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, self._async_close)
+    #endof __init__()
+
+
+    ##############################################################################
+    # Properties
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the shared client session (re-created if it got closed)."""
+        if self._connector is None or self._connector.closed:
+            self._connector = aiohttp.TCPConnector(
+                limit               = POOL_LIMIT,
+                limit_per_host      = POOL_LIMIT_PER_HOST,
+                keepalive_timeout   = POOL_KEEPALIVE_TIMEOUT,
+                use_dns_cache       = True,
+                ttl_dns_cache       = POOL_DNS_CACHE_TTL,
+                ssl                 = self._ssl_context,
+            )
+            self._session = None
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector       = self._connector,
+                connector_owner = False,
+                headers         = {aiohttp.hdrs.USER_AGENT: SERVER_SOFTWARE},
+                trace_configs   = [self._trace_config],
+            )
+
+        return self._session
+    #endof session
+
+
+    def metrics(self, host: Optional[str] = None) -> dict:
+        """Return the pool usage, and the connection counters of a device (or of all of them)."""
+        connector   = self._connector
+        acquired    = getattr(connector, "_acquired", ()) if connector is not None else ()
+        idle        = getattr(connector, "_conns", {}) if connector is not None else {}
+
+        if host is not None:
+            counters = self._metrics.get(host) or {name: 0 for name in COUNTERS}
+        else:
+            counters = {name: sum(m[name] for m in self._metrics.values()) for name in COUNTERS}
+
+        return {
+            "connections_in_use":   len(acquired),
+            "connections_idle":     sum(len(c) for c in idle.values()),
+            **counters,
+        }
+    #endof metrics()
+
+
+    ##############################################################################
+    # Methods
+    @callback
+    def async_acquire(self, user):
+        self._users.add(user)
+    #endof async_acquire()
+
+
+    async def async_release(self, user):
+        """Release the pool for the user, and close it when nobody uses it anymore."""
+        self._users.discard(user)
+        if not self._users:
+            await self._async_close()
+    #endof async_release()
+
+
+    async def _async_close(self, event: Optional[Event] = None):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self._connector is not None and not self._connector.closed:
+            await self._connector.close()
+        self._session   = None
+        self._connector = None
+    #endof _async_close()
+
+
+    ##############################################################################
+    # Tracing
+    @staticmethod
+    def _trace_context(trace_request_ctx = None):
+        return SimpleNamespace(host = None, https = False, trace_request_ctx = trace_request_ctx)
+
+
+    def _counters(self, context) -> dict[str, int]:
+        return self._metrics.setdefault(context.host or "", {name: 0 for name in COUNTERS})
+
+
+    async def _on_request_start(self, session, context, params: aiohttp.TraceRequestStartParams):
+        context.host    = params.url.host
+        context.https   = params.url.scheme == "https"
+        self._counters(context)["requests"] += 1
+
+
+    async def _on_connection_create_end(self, session, context, params):
+        # Every new connection to a device means a TCP connect, and a TLS handshake for HTTPS ones.
+        counters = self._counters(context)
+        counters["connections"] += 1
+        if context.https:
+            counters["handshakes"] += 1
+
+
+    async def _on_connection_reuseconn(self, session, context, params):
+        self._counters(context)["reused"] += 1
+
+
+    async def _on_connection_queued_start(self, session, context, params):
+        self._counters(context)["queued"] += 1
+#endof class ReolinkConnectionPool
+
+
+##########################################################################################################################################################
+# Globals
+##########################################################################################################################################################
+@callback
+def async_get_connection_pool(hass: HomeAssistant) -> ReolinkConnectionPool:
+    """Return the connection pool of the integration, creating it on first use."""
+    data: dict = hass.data.setdefault(DOMAIN_DATA, {})
+    pool = data.get(CONNECTION_POOL)
+    if pool is None:
+        pool = data[CONNECTION_POOL] = ReolinkConnectionPool(hass)
+    return pool
+#endof async_get_connection_pool()
@@ -7,11 +7,32 @@ DEVICE_CONFIG_UPDATE_COORDINATOR        = "coordinator"
 SUBSCRIPTION_WATCHDOG_COORDINATOR       = "subscription_watchdog_coordinator"
 HOST                                    = "host"
 SESSION_RENEW_THRESHOLD                 = 300
+MOTION_STATES_REFRESH_DELAY             = 0.05
+VOD_SEARCH_CACHE_TTL                    = 15
+SNAPSHOT_CACHE_MAX_BYTES                = 8 * 1024 * 1024
+SCALED_SNAPSHOT_CACHE_SIZE              = 16
 MEDIA_SOURCE                            = "media_source"
 THUMBNAIL_VIEW                          = "thumbnail_view"
 SHORT_TOKENS                            = "short_tokens"
 LONG_TOKENS                             = "long_tokens"
+SHORT_TOKEN_LIFETIME                    = 3600
+SHORT_TOKEN_RENEWAL                     = 1800
+LONG_TOKEN_LIFETIME                     = 7 * 24 * 3600
+LONG_TOKEN_RENEWAL                      = 24 * 3600
+TOKENS_MAX                              = 16
 LAST_RECORD                             = "last_record"
+THUMBNAIL_STORES                        = "thumbnail_stores"
+CONNECTION_POOL                         = "connection_pool"
+LAST_RECORD_REFRESH_COOLDOWN            = 10
+STATES_CONFIRMATION_DELAY               = 1.0
+BULK_COMMANDS_WINDOW                    = 0.1
+LATENCY_BUDGET                          = 300
+VOD_STREAM_IDLE_TIMEOUT                 = 120
+VOD_STREAMS_PER_HOST                    = 2
+VOD_SOURCE_CACHE_SIZE                   = 256
+VOD_BROWSE_DAY_LIMIT                    = 48
+VOD_SUMMARY_TTL                         = 60
+VOD_SUMMARY_TIMEOUT                     = 10
 
 CONF_EXTERNAL_HOST                      = "external_host"
 CONF_EXTERNAL_PORT                      = "external_port"
@@ -21,8 +42,13 @@ CONF_PROTOCOL                           = "protocol"
 CONF_MOTION_OFF_DELAY                   = "motion_off_delay"
 CONF_MOTION_FORCE_OFF                   = "motion_force_off"
 CONF_PLAYBACK_DAYS                      = "playback_days"
+CONF_PLAYBACK_TODAY_FOLDER              = "playback_today_folder"
 CONF_THUMBNAIL_PATH                     = "playback_thumbnail_path"
+CONF_THUMBNAIL_QUOTA                    = "playback_thumbnail_quota"
+CONF_THUMBNAIL_CAMERA_QUOTA             = "playback_thumbnail_camera_quota"
+CONF_THUMBNAIL_GLOBAL_QUOTA             = "playback_thumbnail_global_quota"
 CONF_SUBSCRIPTION_WATCHDOG_INTERVAL     = "subscription_watchdog_interval"
+CONF_SNAPSHOT_MAX_AGE                   = "snapshot_max_age"
 
 DEFAULT_EXTERNAL_HOST                   = ""
 DEFAULT_EXTERNAL_PORT                   = ""
@@ -32,10 +58,15 @@ DEFAULT_MOTION_FORCE_OFF                = 0
 DEFAULT_PROTOCOL                        = "rtmp"
 DEFAULT_STREAM                          = "sub"
 DEFAULT_SUBSCRIPTION_WATCHDOG_INTERVAL  = 60
+DEFAULT_SNAPSHOT_MAX_AGE                = 2
 
 DEFAULT_TIMEOUT                         = 60
 DEFAULT_PLAYBACK_DAYS                   = 10
+DEFAULT_PLAYBACK_TODAY_FOLDER           = False
 DEFAULT_THUMBNAIL_OFFSET                = 6
+DEFAULT_THUMBNAIL_QUOTA                 = 0
+DEFAULT_THUMBNAIL_CAMERA_QUOTA          = 0
+DEFAULT_THUMBNAIL_GLOBAL_QUOTA          = 0
 
 SUPPORT_PTZ                             = 1024
 SUPPORT_PLAYBACK                        = 2048
@@ -44,6 +75,8 @@ SERVICE_PTZ_CONTROL                     = "ptz_control"
 SERVICE_SET_BACKLIGHT                   = "set_backlight"
 SERVICE_SET_DAYNIGHT                    = "set_daynight"
 SERVICE_SET_SENSITIVITY                 = "set_sensitivity"
+SERVICE_BULK_SET                        = "bulk_set"
+SERVICE_NOTIFY_VIDEO_LINK               = "notify_video_link"
 
 SERVICE_COMMIT_THUMBNAILS               = "commit_thumbnails"
 SERVICE_CLEANUP_THUMBNAILS              = "cleanup_thumbnails"
@@ -53,5 +86,8 @@ THUMBNAIL_EXTENSION                     = "jpg"
 MOTION_WATCHDOG_TYPE                    = "motion_watchdog"
 MOTION_COMMON_TYPE                      = "motion_common"
 
+VOD_INDEX_STORAGE_KEY                   = DOMAIN + ".{unique_id}.vod_index"
+CAPABILITIES_STORAGE_KEY                = DOMAIN + ".{entry_id}.capabilities"
+
 THUMBNAIL_URL   = "/api/" + DOMAIN + "/media_proxy/{entry_id}/{camera_id}/{event_id}.jpg"
 VOD_URL         = "/api/" + DOMAIN + "/vod/{entry_id}/{camera_id}/{event_id}"
@@ -0,0 +1,50 @@
+"""Diagnostics support for the Reolink IP NVR/camera integration."""
+
+from homeassistant.components.diagnostics   import async_redact_data
+from homeassistant.config_entries           import ConfigEntry
+from homeassistant.const                    import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core                     import HomeAssistant
+
+from .const import DOMAIN, HOST
+from .host  import ReolinkHost
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return the diagnostics of a config entry: the host's capabilities, timings, latencies, and connections."""
+    host: ReolinkHost = hass.data[DOMAIN][entry.entry_id][HOST]
+    capabilities = host.capabilities
+
+    return {
+        "entry": {
+            "data":     async_redact_data(entry.data, TO_REDACT),
+            "options":  dict(entry.options),
+        },
+        "host": {
+            "initialized":      host.initialized,
+            "session_active":   host.api.session_active,
+            "subscribed":       host.api.subscribed,
+            "model":            capabilities.model,
+            "sw_version":       capabilities.sw_version,
+            "is_nvr":           capabilities.is_nvr,
+            "channels":         list(capabilities.channels),
+            "playback_support": capabilities.playback_support,
+        },
+        "startup_timings":  {step: round(duration, 3) for step, duration in host.startup_timings.items()},
+        "polling": {
+            "interval":         host.poll_scheduler.interval,
+            "reason":           host.poll_scheduler.reason,
+            "next_poll":        host.poll_scheduler.next_poll.isoformat() if host.poll_scheduler.next_poll is not None else None,
+            "state_commands":   {channel: sorted(commands) for channel, commands in host.state_commands.items()},
+        },
+        "latency":          host.latency.as_dict(),
+        "connections":      host.connection_metrics,
+        "vod_streams":      host.vod_streams.summary(),
+        "vod_sources":      host.vod_sources_count,
+        "thumbnails": {
+            "count":    host.thumbnails.count,
+            "size":     host.thumbnails.size,
+        },
+    }
+#endof async_get_config_entry_diagnostics()
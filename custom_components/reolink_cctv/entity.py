@@ -1,6 +1,6 @@
 """Reolink parent entity class."""
 
-from homeassistant.core                         import HomeAssistant
+from homeassistant.core                         import HomeAssistant, callback
 from homeassistant.helpers.device_registry      import CONNECTION_NETWORK_MAC
 from homeassistant.helpers.update_coordinator   import CoordinatorEntity
 
@@ -18,32 +18,40 @@ class ReolinkCoordinatorEntity(CoordinatorEntity):
         self._hass              = hass
         self._state             = False
         self._channel           = None
+
+        # The state a successful command set, shown until a states refresh sent after the command.
+        self._optimistic_state              = None
+        self._optimistic_generation: int    = 0
     #endof __init__()
 
 
+    # The state commands ("GetX") the entity's state comes from: only the ones of enabled entities are polled.
+    state_commands: tuple[str, ...] = ()
+
+
     @property
     def device_info(self):
         """Information about this entity/device."""
         conf_url = f"https://{self._host.api._host}:{self._host.api._port}" if self._host.api._use_https else f"http://{self._host.api._host}:{self._host.api._port}"
 
-        if self._host.api.is_nvr and self._channel is not None:
+        if self._host.capabilities.is_nvr and self._channel is not None:
             return {
                 "identifiers":          {(DOMAIN, f"{self._host.unique_id}_ch{self._channel}")},
                 "via_device":           (DOMAIN, self._host.unique_id),
-                "name":                 self._host.api.camera_name(self._channel),
-                "model":                self._host.api.camera_model(self._channel),
-                "manufacturer":         self._host.api.manufacturer,
+                "name":                 self._host.capabilities.camera_name(self._channel),
+                "model":                self._host.capabilities.camera_model(self._channel),
+                "manufacturer":         self._host.capabilities.manufacturer,
                 "configuration_url":    conf_url,
             }
 
         return {
             "identifiers":          {(DOMAIN, self._host.unique_id)},
-            "connections":          {(CONNECTION_NETWORK_MAC, self._host.api.mac_address)},
-            "name":                 self._host.api.nvr_name,
-            "model":                self._host.api.model,
-            "manufacturer":         self._host.api.manufacturer,
-            "hw_version":           self._host.api.hardware_version,
-            "sw_version":           self._host.api.sw_version,
+            "connections":          {(CONNECTION_NETWORK_MAC, self._host.capabilities.mac_address)},
+            "name":                 self._host.capabilities.nvr_name,
+            "model":                self._host.capabilities.model,
+            "manufacturer":         self._host.capabilities.manufacturer,
+            "hw_version":           self._host.capabilities.hardware_version,
+            "sw_version":           self._host.capabilities.sw_version,
             "configuration_url":    conf_url,
         }
     #endof device_info
@@ -56,9 +64,45 @@ class ReolinkCoordinatorEntity(CoordinatorEntity):
     #endof available
 
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        if self.state_commands:
+            self.async_on_remove(self._host.async_register_state_commands(self, self._channel, self.state_commands))
+    #endof async_added_to_hass()
+
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state together with the other entities of the host, if it changed."""
+        self.async_handle_states_refresh()
+    #endof _handle_coordinator_update()
+
+
+    @callback
+    def async_handle_states_refresh(self):
+        """Drop the optimistic state once the states got refreshed after the command, and write the state."""
+        if self._optimistic_state is not None and self._host.states_generation > self._optimistic_generation:
+            self._optimistic_state = None
+        self._host.async_schedule_state_write(self)
+    #endof async_handle_states_refresh()
+
+
+    @callback
+    def async_set_optimistic_state(self, state):
+        """Show the state a command just set successfully, until it gets confirmed by a states refresh."""
+        self._optimistic_state      = state
+        self._optimistic_generation = self._host.states_generation
+        self._host.async_schedule_state_write(self)
+    #endof async_set_optimistic_state()
+
+
     async def request_refresh(self):
-        """Call the coordinator to update the API."""
-        await self.coordinator.async_request_refresh()
+        """Confirm the entity's state after a command: with a debounced refresh shared by the host's entities, of their state commands only."""
+        self._host.poll_scheduler.async_activity()
+        if self.state_commands:
+            self._host.async_request_states_confirmation(self)
+        else:
+            await self.coordinator.async_request_refresh()
         #await self.async_write_ha_state()
     #endof request_refresh()
 #endof class ReolinkCoordinatorEntity
@@ -1,21 +1,25 @@
 """This component encapsulates the NVR/camera API and subscription."""
 
+import asyncio
+import copy
 import logging
-import os
-import ssl
 import datetime as dt
 import aiohttp
 
-from    typing                 import Optional
-from    dateutil.relativedelta import relativedelta
+from    collections            import OrderedDict
+from    contextvars            import ContextVar
+from    typing                 import Callable, Optional
 from    xml.etree              import ElementTree as XML
 
-import  homeassistant.util.dt                   as dt_util
-from    homeassistant.core                      import HomeAssistant
-from    homeassistant.helpers.network           import get_url, NoURLAvailableError
-from    homeassistant.helpers.storage           import STORAGE_DIR
-from    homeassistant.helpers.aiohttp_client    import async_create_clientsession
-from    homeassistant.const                     import (
+from    homeassistant.core                           import CALLBACK_TYPE, HomeAssistant, Event, callback
+from    homeassistant.helpers.debounce               import Debouncer
+from    homeassistant.helpers.network                import get_url, NoURLAvailableError
+from    homeassistant.helpers.storage                import STORAGE_DIR
+from    homeassistant.helpers.entity                 import Entity
+from    homeassistant.components.camera              import Image
+from    homeassistant.components.camera.img_util     import scale_jpeg_camera_image
+from    homeassistant.const                          import (
+    ENTITY_CATEGORY_DIAGNOSTIC,
     CONF_HOST,
     CONF_PORT,
     CONF_USERNAME,
@@ -24,26 +28,35 @@ from    homeassistant.const                     import (
 )
 
 from reolink_ip.typings     import SearchTime
-from reolink_ip.api         import (
-    Host,
-    MOTION_DETECTION_TYPE,
-    FACE_DETECTION_TYPE,
-    PERSON_DETECTION_TYPE,
-    VEHICLE_DETECTION_TYPE,
-    PET_DETECTION_TYPE,
-    VISITOR_DETECTION_TYPE
-)
-
+from reolink_ip.api         import Host
+from reolink_ip.exceptions  import InvalidContentTypeError
+
+from .capabilities  import ReolinkCapabilities
+from .connection    import async_get_connection_pool
+from .latency       import ReolinkLatencyMetrics, STAGE_PARSE, STAGE_SCHEDULING, STAGE_REQUERY, STAGE_WRITE, STAGE_TOTAL
+from .onvif         import OnvifNotificationParser
+from .scheduler     import ReolinkPollScheduler
+from .thumbnails    import ReolinkThumbnailStore
+from .vod_index     import ReolinkVoDIndex
+from .vod_streams   import ReolinkVoDStreams
 from .const import (
-    MOTION_COMMON_TYPE,
     CONF_PLAYBACK_DAYS,
+    CONF_PLAYBACK_TODAY_FOLDER,
     DEFAULT_PLAYBACK_DAYS,
+    DEFAULT_PLAYBACK_TODAY_FOLDER,
+    CONF_THUMBNAIL_QUOTA,
+    CONF_THUMBNAIL_CAMERA_QUOTA,
+    CONF_THUMBNAIL_GLOBAL_QUOTA,
+    DEFAULT_THUMBNAIL_QUOTA,
+    DEFAULT_THUMBNAIL_CAMERA_QUOTA,
+    DEFAULT_THUMBNAIL_GLOBAL_QUOTA,
     CONF_USE_HTTPS,
     CONF_MOTION_OFF_DELAY,
     CONF_MOTION_FORCE_OFF,
     CONF_PROTOCOL,
     CONF_STREAM,
     CONF_SUBSCRIPTION_WATCHDOG_INTERVAL,
+    CONF_SNAPSHOT_MAX_AGE,
     DEFAULT_CHANNELS,
     DEFAULT_MOTION_OFF_DELAY,
     DEFAULT_MOTION_FORCE_OFF,
@@ -51,8 +64,16 @@ from .const import (
     DEFAULT_STREAM,
     DEFAULT_TIMEOUT,
     DEFAULT_SUBSCRIPTION_WATCHDOG_INTERVAL,
+    DEFAULT_SNAPSHOT_MAX_AGE,
     DOMAIN,
-    SESSION_RENEW_THRESHOLD
+    MOTION_STATES_REFRESH_DELAY,
+    VOD_SEARCH_CACHE_TTL,
+    SNAPSHOT_CACHE_MAX_BYTES,
+    SCALED_SNAPSHOT_CACHE_SIZE,
+    SESSION_RENEW_THRESHOLD,
+    VOD_SOURCE_CACHE_SIZE,
+    STATES_CONFIRMATION_DELAY,
+    BULK_COMMANDS_WINDOW
 )
 
 _LOGGER         = logging.getLogger(__name__)
@@ -60,6 +81,33 @@ _LOGGER_DATA    = logging.getLogger(__name__ + ".data")
 
 STORAGE_VERSION = 1
 
+# The state commands, in the order the library's full states request sends them per channel, and the API version
+# attribute of the ones which have a "V20" variant.
+STATE_COMMANDS = (
+    "GetEnc", "GetIsp", "GetIrLights", "GetPowerLed", "GetWhiteLed", "GetPtzPreset", "GetAutoFocus", "GetZoomFocus", "GetOsd", "GetAlarm",
+    "GetEmail", "GetPush", "GetFtp", "GetRec", "GetAudioAlarm",
+)
+STATE_COMMANDS_VERSIONS = {
+    "GetEmail":         "_api_version_getemail",
+    "GetPush":          "_api_version_getpush",
+    "GetFtp":           "_api_version_getftp",
+    "GetRec":           "_api_version_getrec",
+    "GetAudioAlarm":    "_api_version_getalarm",
+}
+
+
+class _StateWritesBatch:
+    """Entities whose states changed while handling one webhook payload."""
+
+    def __init__(self):
+        self.entities: dict[Entity, None]   = dict()
+        self.closed: bool                   = False
+#endof class _StateWritesBatch
+
+
+# The batch of the payload being handled: it propagates to all the listener tasks spawned for that payload.
+_STATE_WRITES_BATCH: ContextVar[Optional[_StateWritesBatch]] = ContextVar("reolink_cctv_state_writes_batch", default = None)
+
 
 ##########################################################################################################################################################
 # Reolink Host class
@@ -71,7 +119,7 @@ class ReolinkHost:
     # with HomeAssistant starting 2022.3 when trying to retrieve internal URL
     warnedAboutNoURLAvailableError = False
 
-    def __init__(self, hass: HomeAssistant, config: dict, options: Optional[dict] = {}):  # pylint: disable=too-many-arguments
+    def __init__(self, hass: HomeAssistant, config: dict, options: Optional[dict] = {}, entry_id: Optional[str] = None):  # pylint: disable=too-many-arguments
         """Initialize Reolink Host. Could be either NVR, or Camera."""
         # global last_known_hass
         # last_known_hass = hass
@@ -94,7 +142,49 @@ class ReolinkHost:
 
         self.motion_detection_enabled: Optional[list(bool)] = None
 
-        self._clientSession: Optional[aiohttp.ClientSession] = None
+        # Event-type -> channel -> listeners, so an event wakes up only the entities interested in it.
+        self._event_listeners: dict[str, dict[int, list[Callable]]] = dict()
+
+        # Motion/AI states refresh, which is not sent yet and is still collecting callers to share it.
+        self._motion_states_refresh: Optional[asyncio.Future] = None
+
+        # Switch commands collected to be sent in one request: (commands body, resulting states, channel, future of the result).
+        self._pending_commands: list[tuple[list[dict], list[tuple[str, str, dict]], int, asyncio.Future]]  = list()
+        self._commands_flush_scheduled: bool                                                                = False
+
+        # VoD searches: results kept for a short time, and searches in progress shared by the callers asking the same.
+        self._vod_search_cache: dict[tuple, tuple[float, tuple]]    = dict()
+        self._vod_search_pending: dict[tuple, asyncio.Future]       = dict()
+        # Resolved VoD sources (least recently used first): (channel, file, external URL, stream) -> (expiry, session token, source).
+        self._vod_sources: OrderedDict[tuple, tuple[float, Optional[str], tuple]] = OrderedDict()
+
+        # Last snapshot per channel (least recently used first), and snapshots being fetched.
+        self._snapshots: OrderedDict[int, tuple[float, bytes]]      = OrderedDict()
+        self._snapshots_pending: dict[int, asyncio.Future]          = dict()
+        # Downscaled snapshots: (channel, width, height) -> (time of the source snapshot, image), and the ones being scaled.
+        self._scaled_snapshots: OrderedDict[tuple, tuple[float, bytes]] = OrderedDict()
+        self._scaled_snapshots_pending: dict[tuple, asyncio.Future]     = dict()
+
+        # Entity -> (channel, state commands) backing it: the states polling only asks for these.
+        self._state_commands_users: dict[Entity, tuple[int, tuple[str, ...]]] = dict()
+        # Number of states refreshes sent so far, so the entities can tell whether one was sent after their command.
+        self._states_generation: int = 0
+        # Whether all the states got fetched once (at startup): the later polls only send the registered state commands.
+        self._all_states_fetched: bool = False
+        # Entities whose state a command changed, to confirm with one refresh of their state commands.
+        self._confirmations: dict[Entity, None] = dict()
+        self._confirmation_debouncer = Debouncer(hass, _LOGGER, cooldown = STATES_CONFIRMATION_DELAY, immediate = False, function = self._async_confirm_states)
+
+        # State writes requested outside of a webhook payload handling (timers, coordinator updates), flushed together.
+        self._pending_state_writes: dict[Entity, None]  = dict()
+        self._state_writes_flush_scheduled: bool        = False
+
+        # Startup step -> duration (seconds), for the startup report. Some steps run concurrently.
+        self.startup_timings: dict[str, float]  = dict()
+        self._startup_begin: float              = hass.loop.time()
+
+        self._connection_pool = async_get_connection_pool(hass)
+        self._connection_pool.async_acquire(self)
         
         cur_stream = (DEFAULT_STREAM if CONF_STREAM not in options else options[CONF_STREAM])
         cur_protocol = (DEFAULT_PROTOCOL if CONF_PROTOCOL not in options else options[CONF_PROTOCOL])
@@ -113,13 +203,25 @@ class ReolinkHost:
             aiohttp_get_session_callback = self.get_iohttp_session
         )
 
-        self._unique_id: Optional[str] = None
+        self._unique_id: Optional[str]              = None
+        self._vod_index: Optional[ReolinkVoDIndex]  = None
+        self._thumbnails                            = ReolinkThumbnailStore(hass, self)
+        self._capabilities                          = ReolinkCapabilities(hass, self, entry_id) if entry_id is not None else None
+        self._initialized: bool                     = False
+        self._poll_scheduler                        = ReolinkPollScheduler(hass, self)
+        self._latency                               = ReolinkLatencyMetrics()
+        self._vod_streams                           = ReolinkVoDStreams(hass, self)
 
         self.motion_off_delay: int                  = DEFAULT_MOTION_OFF_DELAY if CONF_MOTION_OFF_DELAY not in options else options[CONF_MOTION_OFF_DELAY]
         self.motion_force_off: int                  = DEFAULT_MOTION_FORCE_OFF if CONF_MOTION_FORCE_OFF not in options else options[CONF_MOTION_FORCE_OFF]
         self.playback_days: int                     = DEFAULT_PLAYBACK_DAYS if CONF_PLAYBACK_DAYS not in options else options[CONF_PLAYBACK_DAYS]
+        self.playback_today_folder: bool            = options.get(CONF_PLAYBACK_TODAY_FOLDER, DEFAULT_PLAYBACK_TODAY_FOLDER)
         self._thumbnail_path: Optional[str]         = None
+        self.thumbnail_quota: int                   = options.get(CONF_THUMBNAIL_QUOTA, DEFAULT_THUMBNAIL_QUOTA)
+        self.thumbnail_camera_quota: int            = options.get(CONF_THUMBNAIL_CAMERA_QUOTA, DEFAULT_THUMBNAIL_CAMERA_QUOTA)
+        self.thumbnail_global_quota: int            = options.get(CONF_THUMBNAIL_GLOBAL_QUOTA, DEFAULT_THUMBNAIL_GLOBAL_QUOTA)
         self.subscription_watchdog_interval: int    = DEFAULT_SUBSCRIPTION_WATCHDOG_INTERVAL if CONF_SUBSCRIPTION_WATCHDOG_INTERVAL not in options else options[CONF_SUBSCRIPTION_WATCHDOG_INTERVAL]
+        self.snapshot_max_age: float                = options.get(CONF_SNAPSHOT_MAX_AGE, DEFAULT_SNAPSHOT_MAX_AGE)
 
         ##############################################################################
         # Web-hook subscription
@@ -146,6 +248,51 @@ class ReolinkHost:
         """Return the API object."""
         return self._api
 
+    @property
+    def vod_index(self) -> Optional[ReolinkVoDIndex]:
+        """Return the index of the VoD recordings (available once the host got initialized, or its capabilities loaded)."""
+        return self._vod_index
+
+    @property
+    def capabilities(self) -> Optional[ReolinkCapabilities]:
+        """Return the capabilities of the device, as last seen (only for the hosts of a config entry)."""
+        return self._capabilities
+
+    @property
+    def initialized(self) -> bool:
+        """Return whether the device got connected and initialized."""
+        return self._initialized
+
+    @property
+    def states_generation(self) -> int:
+        """Return the number of states refreshes sent so far."""
+        return self._states_generation
+
+    @property
+    def latency(self) -> ReolinkLatencyMetrics:
+        """Return the latency histograms of the webhook-to-state path."""
+        return self._latency
+
+    @property
+    def poll_scheduler(self) -> ReolinkPollScheduler:
+        """Return the scheduler of the states polling."""
+        return self._poll_scheduler
+
+    @property
+    def vod_streams(self) -> ReolinkVoDStreams:
+        """Return the registry of the VoD playback streams."""
+        return self._vod_streams
+
+    @property
+    def connection_metrics(self) -> dict:
+        """Return the usage of the shared connection pool, and the connection counters of this device."""
+        return self._connection_pool.metrics(self._api._host)
+
+    @property
+    def thumbnails(self) -> ReolinkThumbnailStore:
+        """Return the store of the VoD thumbnails."""
+        return self._thumbnails
+
     @property
     def thumbnail_path(self):
         """ Thumbnail storage location """
@@ -199,22 +346,166 @@ class ReolinkHost:
         if self._unique_id is None: # Don't change it on-the-fly after the entry-ID got already initialized with current value
             self._unique_id = self._api.mac_address.replace(":", "")
 
+        if self._vod_index is None:
+            self._vod_index = ReolinkVoDIndex(self._hass, self)
+
         if not await self.register_webhook():
             return False
 
         if self._thumbnail_path is None:
             self._thumbnail_path = self._hass.config.path(f"{STORAGE_DIR}/{DOMAIN}/{self._unique_id}")
 
+        self._thumbnails.async_start()
+
+        self._initialized = True
         return True
     #endof init()
 
 
+    async def async_load_capabilities(self) -> bool:
+        """Load the stored capabilities snapshot, to set up the entities before the device got connected. Returns whether there is one."""
+        if self._capabilities is None or not await self._capabilities.async_load():
+            return False
+
+        if self._unique_id is None:
+            self._unique_id = self._capabilities.unique_id
+        if self._vod_index is None and self._unique_id is not None:
+            self._vod_index = ReolinkVoDIndex(self._hass, self)
+        return True
+    #endof async_load_capabilities()
+
+
+    async def async_timed(self, step: str, awaitable):
+        """Await a startup step, recording its duration for the startup report."""
+        start = self._hass.loop.time()
+        try:
+            return await awaitable
+        finally:
+            self.startup_timings[step] = self._hass.loop.time() - start
+    #endof async_timed()
+
+
+    def log_startup_report(self):
+        _LOGGER.info(
+            "Host %s: set up in %.2fs (%s).",
+            self._api.nvr_name,
+            self._hass.loop.time() - self._startup_begin,
+            ", ".join(f"{step} {duration:.2f}s" for step, duration in self.startup_timings.items())
+        )
+    #endof log_startup_report()
+
+
     async def update_states(self) -> bool:
-        """Call the API of the camera device to update the states."""
-        return await self._api.get_states()
+        """Call the API of the camera device to update the states.
+
+        The first (startup) update fetches all the states, as the capabilities and the setting commands rely on them.
+        The later ones only send the state commands backing the enabled entities (in one request), and nothing when
+        there are none.
+        """
+        self._states_generation += 1
+        if not self._all_states_fetched:
+            self._all_states_fetched = await self._api.get_states()
+            return self._all_states_fetched
+
+        state_commands = self.state_commands
+        if not state_commands:
+            return True
+        return await self._async_send_state_commands(state_commands)
     #endof update_states()
 
 
+    async def _async_send_state_commands(self, state_commands: dict[int, set[str]]) -> bool:
+        """Send the state commands of each channel in one request, and map the responses."""
+        body        = []
+        channels    = []
+        for channel, commands in sorted(state_commands.items()):
+            for command in STATE_COMMANDS:
+                if command in commands:
+                    body.append(self._state_command(command, channel))
+                    channels.append(channel)
+
+        try:
+            json_data = await self._api.send(body, expected_content_type = 'json')
+        except InvalidContentTypeError:
+            _LOGGER.error("Host %s: error translating channels-states response.", self._api.host)
+            return False
+        if json_data is None:
+            _LOGGER.error("Host %s: error obtaining channels-states response.", self._api.host)
+            return False
+
+        self._api.map_channels_json_response(json_data, channels)
+        return True
+    #endof _async_send_state_commands()
+
+
+    @property
+    def state_commands(self) -> dict[int, set[str]]:
+        """Return the state commands backing the entities, per channel."""
+        result: dict[int, set[str]] = dict()
+        for channel, commands in self._state_commands_users.values():
+            result.setdefault(channel, set()).update(commands)
+        return result
+    #endof state_commands
+
+
+    @callback
+    def async_register_state_commands(self, entity: Entity, channel: Optional[int], commands: tuple[str, ...]) -> CALLBACK_TYPE:
+        """Register the state commands an (enabled) entity relies on. Returns the function to unregister them."""
+        # The states of the host-level entities are the ones of the first channel.
+        self._state_commands_users[entity] = (channel if channel is not None else 0, tuple(commands))
+
+        @callback
+        def unregister():
+            self._state_commands_users.pop(entity, None)
+
+        return unregister
+    #endof async_register_state_commands()
+
+
+    @callback
+    def async_request_states_confirmation(self, entity: Entity):
+        """Request the states of the entity to be refreshed after a command, together with the other entities commanded meanwhile."""
+        self._confirmations[entity] = None
+        self._hass.async_create_task(self._confirmation_debouncer.async_call())
+    #endof async_request_states_confirmation()
+
+
+    async def _async_confirm_states(self):
+        entities            = self._confirmations
+        self._confirmations = dict()
+
+        commands: dict[int, set[str]] = dict()
+        for entity in entities:
+            registered = self._state_commands_users.get(entity)
+            if registered is not None:
+                commands.setdefault(registered[0], set()).update(registered[1])
+        if not commands:
+            return
+
+        self._states_generation += 1
+        try:
+            if not await self._async_send_state_commands(commands):
+                return
+        except Exception as e:
+            _LOGGER.error("Host %s: error confirming the states: %s", self._api.host, str(e) or type(e).__name__)
+            return
+
+        for entity in entities:
+            entity.async_handle_states_refresh()
+    #endof _async_confirm_states()
+
+
+    def _state_command(self, command: str, channel: int) -> dict:
+        version = STATE_COMMANDS_VERSIONS.get(command)
+        if version is not None and (getattr(self._api, version, None) or 0) >= 1:
+            command += "V20"
+
+        if command == "GetAlarm":
+            return {"cmd": command, "action": 0, "param": {"Alarm": {"channel": channel, "type": "md"}}}
+        return {"cmd": command, "action": 0, "param": {"channel": channel}}
+    #endof _state_command()
+
+
     async def disconnect(self):
         """Disconnect from the API, so the connection will be released."""
         try:
@@ -239,28 +530,26 @@ class ReolinkHost:
 
     async def stop(self, event = None):
         """Disconnect the API and deregister the event listener."""
-        await self.unregister_webhook()
-        await self.disconnect()
-        for func in self.async_functions:
-            await func()
-        for func in self.sync_functions:
-            await self._hass.async_add_executor_job(func)
+        try:
+            self._thumbnails.async_stop()
+            self._poll_scheduler.async_stop()
+            self._confirmation_debouncer.async_cancel()
+            await self._vod_streams.async_stop()
+            await self.unregister_webhook()
+            await self.disconnect()
+            for func in self.async_functions:
+                await func()
+            for func in self.sync_functions:
+                await self._hass.async_add_executor_job(func)
+        finally:
+            # Whatever failed above, the host must not keep the shared session open.
+            await self._connection_pool.async_release(self)
     #endof stop()
 
 
     def get_iohttp_session(self) -> Optional[aiohttp.ClientSession]:
         """Return the iohttp session."""
-
-        if self._clientSession is None or self._clientSession.closed:
-            context = ssl.create_default_context()
-            context.set_ciphers("DEFAULT")
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-
-            self._clientSession = async_create_clientsession(self._hass, verify_ssl = False)
-            self._clientSession.connector._ssl = context
-
-        return self._clientSession
+        return self._connection_pool.session
     #endof get_iohttp_session()
 
 
@@ -280,7 +569,7 @@ class ReolinkHost:
 
         directory = os.path.join(self.thumbnail_path, f"{channel}")
 
-        _, files = await self._api.request_vod_files(start, end)
+        _, files = await self.async_search_vod_files(channel, start, end)
         for file in files:
             start       = searchtime_to_datetime(file["StartTime"], end.tzinfo)
             event_id    = str(start.timestamp())
@@ -301,18 +590,486 @@ class ReolinkHost:
 
     async def cleanup_vod_thumbnails(self, channel: int):
         """ Cleanup older thumbnail files """
-        start = dt_util.now() - relativedelta(days = int(self.playback_days))
-
-        start_date_timestamp = start.timestamp()
-        directory = os.path.join(self.thumbnail_path, f"{channel}")
-        if os.path.isdir(directory):
-            for f in os.listdir(directory):
-                f = os.path.join(directory, f)
-                if os.stat(f).st_mtime < start_date_timestamp:
-                    os.remove(f)
+        await self._thumbnails.async_prune(channel)
     #endof cleanup_vod_thumbnails()
 
 
+    ######################################################################################################################################################
+    # VoD search
+    ######################################################################################################################################################
+
+    async def async_search_vod_files(self, channel: int, start: dt.datetime, end: dt.datetime, status_only: bool = False):
+        """Search the recordings like api.request_vod_files(), sharing the results among all callers.
+
+        Searches are slow and serialized by the device, while the media browser, the last-record sensors and the index
+        often ask for the same ranges: results are cached for VOD_SEARCH_CACHE_TTL seconds, and a search in progress is
+        awaited by the callers asking for the same one, instead of being sent again.
+        """
+        # Most searches end "now": such ends are matched within the TTL.
+        key     = (channel, int(start.timestamp()), int(end.timestamp()) // VOD_SEARCH_CACHE_TTL, status_only)
+        now     = self._hass.loop.time()
+        cached  = self._vod_search_cache.get(key)
+        if cached is not None:
+            if cached[0] > now:
+                return cached[1]
+            del self._vod_search_cache[key]
+
+        future = self._vod_search_pending.get(key)
+        if future is None:
+            future = self._vod_search_pending[key] = self._hass.loop.create_future()
+            self._hass.async_create_task(self._async_send_vod_search(key, future, channel, start, end, status_only))
+        return await asyncio.shield(future)
+    #endof async_search_vod_files()
+
+
+    async def _async_send_vod_search(self, key: tuple, future: asyncio.Future, channel: int, start: dt.datetime, end: dt.datetime, status_only: bool):
+        try:
+            result = await self._api.request_vod_files(channel, start, end, status_only)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        finally:
+            self._vod_search_pending.pop(key, None)
+
+        if result is not None and (result[0] is not None or result[1] is not None):
+            now = self._hass.loop.time()
+            for k in [k for k, (expiry, _) in self._vod_search_cache.items() if expiry <= now]:
+                del self._vod_search_cache[k]
+            self._vod_search_cache[key] = (now + VOD_SEARCH_CACHE_TTL, result)
+        future.set_result(result)
+    #endof _async_send_vod_search()
+
+
+    async def async_get_vod_source(self, channel: int, file: str, external_url: bool = False) -> tuple[Optional[str], Optional[str]]:
+        """Return the MIME type and the URL of a recording, like api.get_vod_source(), caching them for the session's lifetime.
+
+        A source is valid as long as the session token it got resolved with: it expires when the library would renew
+        the token, and is dropped as soon as the token changed (renewed session, or re-login).
+        """
+        key     = (channel, file, external_url, self._api.stream)
+        token   = getattr(self._api, "_token", None)
+        now     = self._hass.loop.time()
+        cached  = self._vod_sources.get(key)
+        if cached is not None:
+            if cached[0] > now and cached[1] == token:
+                self._vod_sources.move_to_end(key)
+                return cached[2]
+            del self._vod_sources[key]
+
+        source = await self._api.get_vod_source(channel, file, external_url)
+        if source[1] is None:
+            return source
+
+        # The token might have been renewed by the resolution itself.
+        token       = getattr(self._api, "_token", None)
+        lease_time  = getattr(self._api, "_lease_time", None)
+        if token is None or lease_time is None:
+            return source
+        lifetime = (lease_time - dt.datetime.now()).total_seconds() - SESSION_RENEW_THRESHOLD
+        if lifetime > 0:
+            self._vod_sources[key] = (self._hass.loop.time() + lifetime, token, source)
+            while len(self._vod_sources) > VOD_SOURCE_CACHE_SIZE:
+                self._vod_sources.popitem(last = False)
+        return source
+    #endof async_get_vod_source()
+
+
+    @property
+    def vod_sources_count(self) -> int:
+        return len(self._vod_sources)
+
+
+    @callback
+    def async_clear_vod_sources(self):
+        """Forget the resolved VoD sources (e.g. when the external host/port changed)."""
+        self._vod_sources.clear()
+    #endof async_clear_vod_sources()
+
+
+    ######################################################################################################################################################
+    # Switch commands
+    ######################################################################################################################################################
+    async def async_set_switch(self, switch: str, channel: int, enable: bool) -> bool:
+        """Switch the IR lights, spotlight, siren, or doorbell light of a channel.
+
+        The commands of the host requested within a short window are merged into one multi-command request, and each
+        caller gets the result of its own commands. The states are not read back after each command (unlike the library's
+        setters): the library's states get the fields sent, the entities apply them optimistically, and confirm them with
+        their own debounced refresh.
+        """
+        commands = self._switch_commands(switch, channel, enable)
+        if commands is None:
+            return False
+
+        future = self._hass.loop.create_future()
+        self._pending_commands.append((*commands, channel, future))
+        if not self._commands_flush_scheduled:
+            self._commands_flush_scheduled = True
+            self._hass.async_create_task(self._async_send_pending_commands())
+        return await asyncio.shield(future)
+    #endof async_set_switch()
+
+
+    async def _async_send_pending_commands(self):
+        await asyncio.sleep(BULK_COMMANDS_WINDOW)
+        pending                         = self._pending_commands
+        self._pending_commands          = list()
+        self._commands_flush_scheduled  = False
+
+        body    = [command for commands, _, _, _ in pending for command in commands]
+        results = await self._async_send_commands(body)
+        if results is None and len(pending) > 1:
+            # The firmware did not take them together: send each caller's commands on their own.
+            _LOGGER.debug("Host %s: %s merged commands were not accepted, sending them separately.", self._api.host, len(body))
+            for commands, states, channel, future in pending:
+                results = await self._async_send_commands(commands)
+                future.set_result(self._apply_switch_states(results is not None and all(results), states, channel))
+            return
+
+        offset = 0
+        for commands, states, channel, future in pending:
+            succeeded = results is not None and all(results[offset:offset + len(commands)])
+            future.set_result(self._apply_switch_states(succeeded, states, channel))
+            offset += len(commands)
+    #endof _async_send_pending_commands()
+
+
+    def _apply_switch_states(self, succeeded: bool, states: list[tuple[str, str, dict]], channel: int) -> bool:
+        """Update the library's states with the fields which were set, as its Get commands would. Returns succeeded.
+
+        Only the fields sent are changed: the others keep the values the library last read from the device.
+        """
+        if succeeded:
+            for attribute, command, fields in states:
+                value = copy.deepcopy(getattr(self._api, attribute).get(channel) or {})
+                _merge(value, fields)
+                self._api.map_channel_json_response([{"cmd": command, "code": 0, "value": value}], channel)
+        return succeeded
+    #endof _apply_switch_states()
+
+
+    async def _async_send_commands(self, body: list[dict]) -> Optional[list[bool]]:
+        """Send the commands in one request. Returns whether each succeeded, or None if the response does not match them."""
+        _LOGGER.debug("Host %s: sending %s commands: %s", self._api.host, len(body), body)
+        try:
+            json_data = await self._api.send(body, expected_content_type = 'json')
+        except Exception as e:
+            _LOGGER.error("Host %s: error sending the commands: %s", self._api.host, str(e) or type(e).__name__)
+            return None
+        if json_data is None or len(json_data) != len(body):
+            return None
+
+        results = []
+        for command, data in zip(body, json_data):
+            try:
+                succeeded = data["code"] == 0 and data["value"]["rspCode"] == 200
+            except (KeyError, TypeError):
+                succeeded = False
+            if not succeeded:
+                _LOGGER.error("Host %s: command \"%s\" error: %s", self._api.host, command["cmd"], data)
+            results.append(succeeded)
+        return results
+    #endof _async_send_commands()
+
+
+    def _switch_commands(self, switch: str, channel: int, enable: bool) -> Optional[tuple[list[dict], list[tuple[str, str, dict]]]]:
+        """Return the commands switching on/off a channel's feature, and the (settings attribute, Get command, fields set) states.
+
+        The commands carry the same parameters as the library's setters (the channel and the switched fields only), and
+        like them nothing is sent when the library has no settings of the feature (it is not available).
+        """
+        if channel not in self._api.channels:
+            return None
+
+        if switch == "irLights":
+            if self._switch_settings("_ir_settings", channel, "IR light") is None:
+                return None
+            fields = {"state": "Auto" if enable else "Off"}
+            return (
+                [{"cmd": "SetIrLights", "action": 0, "param": {"IrLights": {"channel": channel, **fields}}}],
+                [("_ir_settings", "GetIrLights", {"IrLights": fields})]
+            )
+
+        if switch == "doorbellLight":
+            if self._switch_settings("_power_led_settings", channel, "Power led") is None:
+                return None
+            # SetPowerLed needs the power LED's state too: the current one is kept.
+            fields = {"state": "On" if self._api.power_led_enabled(channel) else "Off", "eDoorbellLightState": "On" if enable else "Off"}
+            return (
+                [{"cmd": "SetPowerLed", "action": 0, "param": {"PowerLed": {"channel": channel, **fields}}}],
+                [("_power_led_settings", "GetPowerLed", {"PowerLed": fields})]
+            )
+
+        if switch == "spotlight":
+            if self._switch_settings("_whiteled_settings", channel, "White Led") is None:
+                return None
+            # The lighting schedule all day long (or never), then the light itself.
+            schedule    = {"EndHour": 23, "EndMin": 59, "StartHour": 0, "StartMin": 0} if enable else {"EndHour": 0, "EndMin": 0, "StartHour": 0, "StartMin": 0}
+            light       = {"state": 1 if enable else 0, "mode": 3 if enable else 1, "bright": 100}
+            return (
+                [
+                    {"cmd": "SetWhiteLed", "param": {"WhiteLed": {"LightingSchedule": schedule, "channel": channel, "mode": 3}}},
+                    {"cmd": "SetWhiteLed", "param": {"WhiteLed": {"channel": channel, **light}}},
+                ],
+                [("_whiteled_settings", "GetWhiteLed", {"WhiteLed": {"LightingSchedule": schedule, **light}})]
+            )
+
+        if switch == "siren":
+            if self._switch_settings("_audio_alarm_settings", channel, "AudioAlarm") is None:
+                return None
+            enabled = 1 if enable else 0
+            if getattr(self._api, "_api_version_getalarm", 0) == 0:
+                alarm = {"cmd": "SetAudioAlarm", "param": {"Audio": {"schedule": {"enable": enabled, "channel": channel}}}}
+                state = ("_audio_alarm_settings", "GetAudioAlarm", {"Audio": {"schedule": {"enable": enabled}}})
+            else:
+                alarm = {"cmd": "SetAudioAlarmV20", "param": {"Audio": {"enable": enabled, "channel": channel}}}
+                state = ("_audio_alarm_settings", "GetAudioAlarmV20", {"Audio": {"enable": enabled}})
+            return (
+                [
+                    alarm,
+                    {"cmd": "AudioAlarmPlay", "action": 0, "param": {"alarm_mode": "manul", "manual_switch": enabled, "times": 2, "channel": channel}},
+                ],
+                [state]
+            )
+
+        _LOGGER.error("Host %s: unsupported switch \"%s\".", self._api.host, switch)
+        return None
+    #endof _switch_commands()
+
+
+    def _switch_settings(self, attribute: str, channel: int, feature: str) -> Optional[dict]:
+        """Return the library's settings of a channel's feature, or None (logged, like its setters) if it has none."""
+        settings = getattr(self._api, attribute, None)
+        if not settings or not settings.get(channel):
+            _LOGGER.error("%s on camera %s is not available.", feature, self._api.camera_name(channel))
+            return None
+        return settings[channel]
+    #endof _switch_settings()
+
+
+    ######################################################################################################################################################
+    # Snapshots
+    ######################################################################################################################################################
+
+    async def async_get_snapshot(self, channel: int, width: Optional[int] = None, height: Optional[int] = None) -> Optional[bytes]:
+        """Get the still image of the channel, like api.get_snapshot(), sharing it among all callers.
+
+        All the camera entities of a channel, the dashboards and the thumbnails ask for the same image, while the device
+        is slow to produce it: an image is reused until it is snapshot_max_age seconds old, and one being fetched is
+        awaited by the other callers. The cached images of all the channels are bounded by SNAPSHOT_CACHE_MAX_BYTES.
+
+        With a width/height, the image is downscaled (in the executor) and the result is cached for the source image.
+        """
+        timestamp, image = await self._async_get_snapshot_frame(channel)
+        if not image or (width is None and height is None):
+            return image
+
+        key     = (channel, width, height)
+        cached  = self._scaled_snapshots.get(key)
+        if cached is not None and cached[0] == timestamp:
+            self._scaled_snapshots.move_to_end(key)
+            return cached[1]
+
+        future = self._scaled_snapshots_pending.get(key + (timestamp,))
+        if future is None:
+            future = self._scaled_snapshots_pending[key + (timestamp,)] = self._hass.loop.create_future()
+            self._hass.async_create_task(self._async_scale_snapshot(key, timestamp, image, future))
+        return await asyncio.shield(future)
+    #endof async_get_snapshot()
+
+
+    async def _async_get_snapshot_frame(self, channel: int) -> tuple[float, Optional[bytes]]:
+        cached = self._snapshots.get(channel)
+        if cached is not None:
+            if self._hass.loop.time() - cached[0] < self.snapshot_max_age:
+                self._snapshots.move_to_end(channel)
+                return cached
+            del self._snapshots[channel]
+
+        future = self._snapshots_pending.get(channel)
+        if future is None:
+            future = self._snapshots_pending[channel] = self._hass.loop.create_future()
+            self._hass.async_create_task(self._async_fetch_snapshot(channel, future))
+        return await asyncio.shield(future)
+    #endof _async_get_snapshot_frame()
+
+
+    async def _async_fetch_snapshot(self, channel: int, future: asyncio.Future):
+        try:
+            image = await self._api.get_snapshot(channel)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        finally:
+            self._snapshots_pending.pop(channel, None)
+
+        frame = (self._hass.loop.time(), image)
+        if image and self.snapshot_max_age > 0:
+            self._snapshots[channel] = frame
+            size = sum(len(i) for _, i in self._snapshots.values())
+            while size > SNAPSHOT_CACHE_MAX_BYTES and len(self._snapshots) > 1:
+                _, (_, evicted) = self._snapshots.popitem(last = False)
+                size -= len(evicted)
+        future.set_result(frame)
+    #endof _async_fetch_snapshot()
+
+
+    async def _async_scale_snapshot(self, key: tuple, timestamp: float, image: bytes, future: asyncio.Future):
+        _, width, height = key
+        try:
+            scaled = await self._hass.async_add_executor_job(scale_jpeg_camera_image, Image("image/jpeg", image), width or 0, height or 0)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        finally:
+            self._scaled_snapshots_pending.pop(key + (timestamp,), None)
+
+        # Only the sizes of the current source images are worth keeping.
+        self._scaled_snapshots[key] = (timestamp, scaled)
+        self._scaled_snapshots.move_to_end(key)
+        while len(self._scaled_snapshots) > SCALED_SNAPSHOT_CACHE_SIZE:
+            self._scaled_snapshots.popitem(last = False)
+        future.set_result(scaled)
+    #endof _async_scale_snapshot()
+
+
+    ######################################################################################################################################################
+    # Events dispatching
+    ######################################################################################################################################################
+
+    @callback
+    def async_add_event_listener(self, event_type: str, channel: int, action: Callable) -> CALLBACK_TYPE:
+        """Register an entity's coroutine to be called on events of the type for the channel. Returns the function to remove it."""
+        listeners = self._event_listeners.setdefault(event_type, dict()).setdefault(channel, list())
+        listeners.append(action)
+
+        @callback
+        def remove_listener():
+            if action in listeners:
+                listeners.remove(action)
+
+        return remove_listener
+    #endof async_add_event_listener()
+
+
+    async def async_dispatch_events(self, events: list[dict], channel: Optional[int] = None, received: Optional[float] = None, parsed: Optional[float] = None):
+        """Route the events to the listeners of their types: for one channel, or for all of them if the channel is unknown (like in webhook events).
+
+        For webhook events, the (event loop) times the webhook got called and its payload parsed time the latency stages.
+        """
+        if parsed is not None:
+            self._latency.record(STAGE_SCHEDULING, self._hass.loop.time() - parsed)
+
+        jobs = []
+        for data in events:
+            event = Event(self._event_id, data)
+            for event_type in data:
+                channels = self._event_listeners.get(event_type)
+                if not channels:
+                    continue
+                if channel is None:
+                    for listeners in channels.values():
+                        jobs.extend(action(event) for action in listeners)
+                elif channel in channels:
+                    jobs.extend(action(event) for action in channels[channel])
+
+        if not jobs:
+            return
+
+        batch = _StateWritesBatch()
+        token = _STATE_WRITES_BATCH.set(batch)
+        try:
+            results = await asyncio.gather(*jobs, return_exceptions = True)
+        finally:
+            _STATE_WRITES_BATCH.reset(token)
+            batch.closed = True
+            start = self._hass.loop.time()
+            self.async_write_states(batch.entities)
+            if batch.entities:
+                end = self._hass.loop.time()
+                self._latency.record(STAGE_WRITE, end - start)
+                if received is not None:
+                    self._latency.record(STAGE_TOTAL, end - received)
+
+        for result in results:
+            if isinstance(result, Exception):
+                _LOGGER.error("Host %s: error handling event: %s", self._api.host, str(result), exc_info = result)
+    #endof async_dispatch_events()
+
+
+    @callback
+    def async_schedule_state_write(self, entity: Entity):
+        """Request the entity's state to be written: together with all other states changed by the same payload (or the same loop iteration)."""
+        batch = _STATE_WRITES_BATCH.get()
+        if batch is not None and not batch.closed:
+            batch.entities[entity] = None
+            return
+
+        self._pending_state_writes[entity] = None
+        if not self._state_writes_flush_scheduled:
+            self._state_writes_flush_scheduled = True
+            self._hass.loop.call_soon(self._flush_pending_state_writes)
+    #endof async_schedule_state_write()
+
+
+    @callback
+    def _flush_pending_state_writes(self):
+        self._state_writes_flush_scheduled  = False
+        entities                            = self._pending_state_writes
+        self._pending_state_writes          = dict()
+        self.async_write_states(entities)
+    #endof _flush_pending_state_writes()
+
+
+    @callback
+    def async_write_states(self, entities):
+        """Write the states of the entities in one pass.
+
+        The state machine ignores the writes which change nothing (keeping its State object), which tells whether
+        some state actually changed.
+        """
+        changed = False
+        for entity in entities:
+            if entity.hass is None or entity.entity_id is None:
+                continue
+            previous = self._hass.states.get(entity.entity_id)
+            entity.async_write_ha_state()
+            # The diagnostic entities change on their own (e.g. with the polling itself): they do not tell the states are changing.
+            if entity.entity_category != ENTITY_CATEGORY_DIAGNOSTIC and self._hass.states.get(entity.entity_id) is not previous:
+                changed = True
+
+        if changed:
+            self._poll_scheduler.async_states_changed()
+    #endof async_write_states()
+
+
+    async def async_refresh_motion_states(self) -> bool:
+        """Refresh the motion/AI states of all channels at once.
+
+        Callers arriving within a short delay share one batched request, so e.g. a "common motion" event handled by
+        every channel's sensor costs one device round-trip. Callers arriving after the request got sent will get
+        a new one, to never obtain states which are older than their event.
+        """
+        if self._motion_states_refresh is None:
+            self._motion_states_refresh = self._hass.loop.create_future()
+            self._hass.async_create_task(self._async_send_motion_states_refresh(self._motion_states_refresh))
+        return await asyncio.shield(self._motion_states_refresh)
+    #endof async_refresh_motion_states()
+
+
+    async def _async_send_motion_states_refresh(self, future: asyncio.Future):
+        await asyncio.sleep(MOTION_STATES_REFRESH_DELAY)
+        self._motion_states_refresh = None
+        start = self._hass.loop.time()
+        try:
+            future.set_result(await self._api.get_all_motion_states_all_channels())
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            self._latency.record(STAGE_REQUERY, self._hass.loop.time() - start)
+    #endof _async_send_motion_states_refresh()
+
+
     ######################################################################################################################################################
     # Web-hook subscription
     ######################################################################################################################################################
@@ -372,7 +1129,7 @@ class ReolinkHost:
         self._webhook_id    = f"reolink_{no_spaces_name}_webhook"#self._hass.components.webhook.async_generate_id()
         self._event_id      = self._webhook_id
         try:
-            self._hass.components.webhook.async_register(DOMAIN, self._event_id, self._webhook_id, handle_webhook)
+            self._hass.components.webhook.async_register(DOMAIN, self._event_id, self._webhook_id, self.handle_webhook)
         except ValueError:
             _LOGGER.debug("Error registering webhook %s. Trying to unregister it first and re-register again.", self._webhook_id)
             try:
@@ -381,7 +1138,7 @@ class ReolinkHost:
                 _LOGGER.debug("Error unregistering webhook %s: %s", self._webhook_id, str(e))
 
             try:
-                self._hass.components.webhook.async_register(DOMAIN, self._event_id, self._webhook_id, handle_webhook)
+                self._hass.components.webhook.async_register(DOMAIN, self._event_id, self._webhook_id, self.handle_webhook)
             except ValueError:
                 _LOGGER.error("Error registering a webhook %s for %s: maybe a duplicate device-name in your setup?", self._webhook_id, device_name)
                 self._event_id      = None
@@ -480,6 +1237,47 @@ class ReolinkHost:
         self._webhook_id    = None
         self._webhook_url   = None
     #endof unregister_webhook()
+
+
+    async def handle_webhook(self, hass: HomeAssistant, webhook_id: str, request):
+        """Handle incoming webhook from Reolink for inbound messages and calls."""
+        received = hass.loop.time()
+
+        _LOGGER.info("Webhook called (%s).", webhook_id)
+
+        if not request.body_exists:
+            _LOGGER.info("Webhook triggered without payload (%s).", webhook_id)
+
+        parser  = OnvifNotificationParser()
+        raw     = [] if _LOGGER_DATA.isEnabledFor(logging.DEBUG) else None
+        try:
+            async for chunk in request.content.iter_any():
+                if raw is not None:
+                    raw.append(chunk)
+                parser.feed(chunk)
+
+            if parser.size == 0:
+                _LOGGER.info("Webhook triggered with unknown payload (%s).", webhook_id)
+                return
+
+            events = parser.close()
+            parsed = hass.loop.time()
+            self._latency.record(STAGE_PARSE, parsed - received)
+        except XML.ParseError as e:
+            _LOGGER.error("Webhook received a malformed payload (%s): %s", webhook_id, str(e))
+            return
+        finally:
+            if raw:
+                _LOGGER_DATA.debug("Webhook received payload (%s):\n%s", webhook_id, b"".join(raw).decode(errors = "replace"))
+
+        # Keep firing the bus events too, for the automations relying on them.
+        for data in events:
+            hass.bus.async_fire(webhook_id, data)
+
+        if events:
+            self._poll_scheduler.async_activity()
+            hass.async_create_task(self.async_dispatch_events(events, received = received, parsed = parsed))
+    #endof handle_webhook()
 #endof class ReolinkHost
 
 
@@ -493,111 +1291,6 @@ class ReolinkHost:
 #last_known_hass: Optional[HomeAssistant] = None
 
 
-async def handle_webhook(hass: HomeAssistant, webhook_id: str, request):
-    """Handle incoming webhook from Reolink for inbound messages and calls."""
-
-    _LOGGER.info("Webhook called (%s).", webhook_id)
-
-    if not request.body_exists:
-        _LOGGER.info("Webhook triggered without payload (%s).", webhook_id)
-
-    data = await request.text()
-    if not data:
-        _LOGGER.info("Webhook triggered with unknown payload (%s).", webhook_id)
-        return
-
-    _LOGGER_DATA.debug("Webhook received payload (%s):\n%s", webhook_id, data)
-
-    motion                      = None
-    face                        = None
-    person                      = None
-    vehicle                     = None
-    pet                         = None
-    motion_alarm                = None
-    visitor                     = None
-    motion_common_notification  = True
-
-    root = XML.fromstring(data)
-    for message in root.iter('{http://docs.oasis-open.org/wsn/b-2}NotificationMessage'):
-        topic_element = message.find("{http://docs.oasis-open.org/wsn/b-2}Topic[@Dialect='http://www.onvif.org/ver10/tev/topicExpression/ConcreteSet']")
-        if topic_element is None:
-            continue
-        rule = os.path.basename(topic_element.text)
-        if not rule:
-            continue
-
-        if rule == "Motion":
-            data_element = message.find(".//{http://www.onvif.org/ver10/schema}SimpleItem[@Name='IsMotion']")
-            if data_element is None:
-                continue
-            if "Value" in data_element.attrib:
-                motion = data_element.attrib["Value"] == "true"
-        elif rule == "FaceDetect":
-            data_element = message.find(".//{http://www.onvif.org/ver10/schema}SimpleItem[@Name='State']")
-            if data_element is None:
-                continue
-            if "Value" in data_element.attrib:
-                face = data_element.attrib["Value"] == "true"
-                if motion_common_notification:
-                    motion_common_notification = False
-        elif rule == "PeopleDetect":
-            data_element = message.find(".//{http://www.onvif.org/ver10/schema}SimpleItem[@Name='State']")
-            if data_element is None:
-                continue
-            if "Value" in data_element.attrib:
-                person = data_element.attrib["Value"] == "true"
-                if motion_common_notification:
-                    motion_common_notification = False
-        elif rule == "VehicleDetect":
-            data_element = message.find(".//{http://www.onvif.org/ver10/schema}SimpleItem[@Name='State']")
-            if data_element is None:
-                continue
-            if "Value" in data_element.attrib:
-                vehicle = data_element.attrib["Value"] == "true"
-                if motion_common_notification:
-                    motion_common_notification = False
-        elif rule == "DogCatDetect":
-            data_element = message.find(".//{http://www.onvif.org/ver10/schema}SimpleItem[@Name='State']")
-            if data_element is None:
-                continue
-            if "Value" in data_element.attrib:
-                pet = data_element.attrib["Value"] == "true"
-                if motion_common_notification:
-                    motion_common_notification = False
-        elif rule == "MotionAlarm":
-            data_element = message.find(".//{http://www.onvif.org/ver10/schema}SimpleItem[@Name='State']")
-            if data_element is None:
-                continue
-            if "Value" in data_element.attrib:
-                motion_alarm = data_element.attrib["Value"] == "true"
-        elif rule == "Visitor":
-            data_element = message.find(".//{http://www.onvif.org/ver10/schema}SimpleItem[@Name='State']")
-            if data_element is None:
-                continue
-            if "Value" in data_element.attrib:
-                visitor = data_element.attrib["Value"] == "true"
-
-    if motion is not None:
-        if motion_common_notification:
-            hass.bus.async_fire(webhook_id, {MOTION_COMMON_TYPE: motion})
-        else:
-            hass.bus.async_fire(webhook_id, {MOTION_DETECTION_TYPE: motion})
-    elif motion_alarm is not None:
-        if motion_common_notification:
-            hass.bus.async_fire(webhook_id, {MOTION_COMMON_TYPE: motion_alarm})
-        else:
-            hass.bus.async_fire(webhook_id, {MOTION_DETECTION_TYPE: motion_alarm})
-    if face is not None:
-        hass.bus.async_fire(webhook_id, {FACE_DETECTION_TYPE: face})
-    if person is not None:
-        hass.bus.async_fire(webhook_id, {PERSON_DETECTION_TYPE: person})
-    if vehicle is not None:
-        hass.bus.async_fire(webhook_id, {VEHICLE_DETECTION_TYPE: vehicle})
-    if pet is not None:
-        hass.bus.async_fire(webhook_id, {PET_DETECTION_TYPE: pet})
-    if visitor is not None:
-        hass.bus.async_fire(webhook_id, {VISITOR_DETECTION_TYPE: visitor})
-#endof handle_webhook()
 
 
 def searchtime_to_datetime(self: SearchTime, timezone: dt.tzinfo):
@@ -614,6 +1307,16 @@ def searchtime_to_datetime(self: SearchTime, timezone: dt.tzinfo):
 #endof searchtime_to_datetime()
 
 
+def _merge(target: dict, fields: dict):
+    """Set the fields into the target dict, recursively for the nested ones."""
+    for key, value in fields.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+#endof _merge()
+
+
 # def callback_get_iohttp_session():
 #     """Return the iohttp session for the last known hass instance."""
 #     global last_known_hass
@@ -0,0 +1,108 @@
+"""Latency histograms of the event handling stages of a Reolink host."""
+
+from typing import Optional
+
+from .const import LATENCY_BUDGET
+
+# Upper bounds of the histograms' buckets, in milliseconds (the last bucket has none).
+LATENCY_BUCKETS     = (5, 10, 25, 50, 100, 200, 300, 500, 1000, 2000, 5000)
+
+STAGE_PARSE         = "parse"       # Webhook called -> ONVIF payload parsed.
+STAGE_SCHEDULING    = "scheduling"  # Payload parsed -> its events dispatched to the entities (event loop delay).
+STAGE_REQUERY       = "requery"     # Motion/AI states re-queried from the device.
+STAGE_WRITE         = "write"       # States of the entities written to the state machine.
+STAGE_TOTAL         = "total"       # Webhook called -> states written.
+
+LATENCY_STAGES      = (STAGE_PARSE, STAGE_SCHEDULING, STAGE_REQUERY, STAGE_WRITE, STAGE_TOTAL)
+
+
+##########################################################################################################################################################
+# Histogram class
+##########################################################################################################################################################
+class LatencyHistogram:
+    """Durations in milliseconds, counted in fixed buckets: the percentiles are the upper bounds of their buckets."""
+
+    def __init__(self):
+        self.buckets: list[int]     = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count: int             = 0
+        self.total: float           = 0.0
+        self.max: float             = 0.0
+        self.over_budget: int       = 0
+    #endof __init__()
+
+
+    def record(self, duration: float):
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if duration <= bound), len(LATENCY_BUCKETS))
+        self.buckets[index] += 1
+        self.count          += 1
+        self.total          += duration
+        self.max            = max(self.max, duration)
+        if duration > LATENCY_BUDGET:
+            self.over_budget += 1
+    #endof record()
+
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the upper bound of the bucket of the q-quantile (the maximum, for the last bucket)."""
+        if not self.count:
+            return None
+        rank        = q * self.count
+        cumulated   = 0
+        for index, count in enumerate(self.buckets):
+            cumulated += count
+            if cumulated >= rank:
+                return min(LATENCY_BUCKETS[index], self.max) if index < len(LATENCY_BUCKETS) else self.max
+        return self.max
+    #endof percentile()
+
+
+    def as_dict(self) -> dict:
+        return {
+            "count":        self.count,
+            "mean":         _round(self.mean),
+            "p50":          _round(self.percentile(0.5)),
+            "p95":          _round(self.percentile(0.95)),
+            "p99":          _round(self.percentile(0.99)),
+            "max":          _round(self.max if self.count else None),
+            "budget":       LATENCY_BUDGET,
+            "over_budget":  self.over_budget,
+            "buckets":      {f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS, self.buckets)} | {"inf": self.buckets[-1]},
+        }
+    #endof as_dict()
+#endof class LatencyHistogram
+
+
+##########################################################################################################################################################
+# Latency metrics class
+##########################################################################################################################################################
+class ReolinkLatencyMetrics:
+    """One histogram per stage of the webhook-to-state path."""
+
+    def __init__(self):
+        self._histograms: dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in LATENCY_STAGES}
+    #endof __init__()
+
+
+    def record(self, stage: str, seconds: float):
+        self._histograms[stage].record(seconds * 1000)
+    #endof record()
+
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        return self._histograms[stage]
+    #endof histogram()
+
+
+    def as_dict(self) -> dict:
+        return {stage: histogram.as_dict() for stage, histogram in self._histograms.items()}
+    #endof as_dict()
+#endof class ReolinkLatencyMetrics
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
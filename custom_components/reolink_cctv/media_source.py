@@ -1,9 +1,8 @@
 """Reolink Camera Media Source Implementation."""
 
+import asyncio
 import datetime as dt
 import logging
-import os
-import secrets
 
 from typing         import Optional
 from urllib.parse   import quote_plus, unquote_plus
@@ -12,12 +11,9 @@ from dateutil       import relativedelta
 
 import homeassistant.util.dt as dt_utils
 
-from homeassistant.components.stream.const          import HLS_PROVIDER
 from homeassistant.components.http.const            import KEY_AUTHENTICATED
 from homeassistant.core                             import HomeAssistant, callback
-from homeassistant.helpers.event                    import async_call_later
 from homeassistant.components.http                  import HomeAssistantView
-from homeassistant.components.stream                import create_stream
 from homeassistant.components.media_player.errors   import BrowseError
 from homeassistant.components.media_source.const    import MEDIA_MIME_TYPES
 from homeassistant.components.media_source.error    import MediaSourceError, Unresolvable
@@ -34,22 +30,24 @@ from homeassistant.components.media_player.const    import (
 )
 
 # from . import typings
-from .host  import ReolinkHost, searchtime_to_datetime
-from .const import (
+from .host      import ReolinkHost, searchtime_to_datetime
+from .tokens    import async_get_tokens
+from .const     import (
     HOST,
     DOMAIN,
-    DOMAIN_DATA,
     LONG_TOKENS,
-    MEDIA_SOURCE,
     SHORT_TOKENS,
-    THUMBNAIL_EXTENSION,
     THUMBNAIL_URL,
+    VOD_BROWSE_DAY_LIMIT,
+    VOD_SUMMARY_TIMEOUT,
+    VOD_SUMMARY_TTL,
     VOD_URL,
 )
 
 _LOGGER         = logging.getLogger(__name__)
 NAME            = "Reolink IP NVR/camera"
 STORAGE_VERSION = 1
+TODAY_FOLDER    = "today"
 
 
 ##########################################################################################################################################################
@@ -79,8 +77,9 @@ class ReolinkMediaSource(MediaSource):
     def __init__(self, hass: HomeAssistant):
         super().__init__(DOMAIN)
 
-        self.hass                       = hass
-        self._last_token: dt.datetime   = None
+        self.hass                                       = hass
+        self._summaries_task: Optional[asyncio.Task]    = None
+        self._summaries_updated: Optional[float]        = None
         # self._stream_prefs: DynamicStreamSettings = DynamicStreamSettings()
     #endof __init__()
 
@@ -88,21 +87,8 @@ class ReolinkMediaSource(MediaSource):
     ##############################################################################
     # Properties
     @property
-    def _short_security_token(self):
-        def clear_token():
-            tokens.remove(token)
-
-        data: dict          = self.hass.data.setdefault(DOMAIN_DATA, {})
-        data                = data.setdefault(MEDIA_SOURCE, {})
-        tokens: list[str]   = data.setdefault(SHORT_TOKENS, [])
-
-        if len(tokens) < 1 or (self._last_token and (self._last_token - dt_utils.now()).seconds >= 1800):
-            self._last_token = dt_utils.now()
-            tokens.append(secrets.token_hex())
-            async_call_later(self.hass, 3600, clear_token)
-
-        token = next(iter(tokens), None)
-        return token
+    def _short_security_token(self) -> str:
+        return async_get_tokens(self.hass, SHORT_TOKENS).current()
     #endof _short_security_token()
 
 
@@ -122,20 +108,8 @@ class ReolinkMediaSource(MediaSource):
         if not file:
             raise BrowseError("Empty event passed to async_resolve_media().")
 
-        mime_type, url = await host.api.get_vod_source(int(camera_id), file)
-
-        try:
-            from homeassistant.components.camera import DynamicStreamSettings
-            from homeassistant.components.camera import CameraPreferences
-            from homeassistant.components.camera import DATA_CAMERA_PREFS
-            prefs: CameraPreferences = self.hass.data[DATA_CAMERA_PREFS]
-            stream_prefs: DynamicStreamSettings = await prefs.get_dynamic_stream_settings(host.cameras[int(camera_id)].entity_id)
-            stream = create_stream(self.hass, url, {}, dynamic_stream_settings = stream_prefs)
-        except ImportError: #ModuleNotFoundError:
-            stream = create_stream(self.hass, url, {})
-
-        stream.add_provider(HLS_PROVIDER, timeout = 3600)
-        url: str = stream.endpoint_url(HLS_PROVIDER)
+        # The stream of the recording is shared by its viewers, while it runs.
+        mime_type, url = await host.vod_streams.async_resolve(int(camera_id), file)
         # #HACK: The media browser seems to have a problem with the master_playlist (it does not load the referenced playlist)
         # so we will just force the reference playlist instead, this seems to work though technically wrong
         url = url.replace("master_", "")
@@ -155,6 +129,8 @@ class ReolinkMediaSource(MediaSource):
         data: dict          = self.hass.data[self.domain]
         entry: dict         = data.get(entry_id) if entry_id else None
         host: ReolinkHost   = entry.get(HOST) if entry else None
+        if entry_id == TODAY_FOLDER and not camera_id:
+            return await self._async_browse_today(source)
         if entry_id and not host:
             raise BrowseError("Host entry {} in domain {} does not exist.".format(entry_id, self.domain))
 
@@ -165,6 +141,78 @@ class ReolinkMediaSource(MediaSource):
     #endof async_browse_media()
 
 
+    ##############################################################################
+    # Recording summaries
+    @callback
+    def _async_refresh_summaries(self) -> Optional[asyncio.Task]:
+        """Start refreshing the recording summaries in the background, unless they are recent or being refreshed."""
+        if self._summaries_task is not None and not self._summaries_task.done():
+            return self._summaries_task
+        if self._summaries_updated is not None and self.hass.loop.time() - self._summaries_updated < VOD_SUMMARY_TTL:
+            return None
+        self._summaries_task = self.hass.async_create_task(self._async_update_summaries())
+        return self._summaries_task
+    #endof _async_refresh_summaries()
+
+
+    async def _async_update_summaries(self):
+        """Search the recordings of all the hosts concurrently: a slow host only delays its own cameras."""
+        hosts = [
+            entry[HOST] for entry in self.hass.data[self.domain].values()
+            if isinstance(entry, dict) and HOST in entry and entry[HOST].initialized and entry[HOST].capabilities.playback_support
+        ]
+        await asyncio.gather(*(self._async_update_host_summaries(host) for host in hosts))
+        self._summaries_updated = self.hass.loop.time()
+    #endof _async_update_summaries()
+
+
+    @staticmethod
+    async def _async_update_host_summaries(host: ReolinkHost):
+        try:
+            await asyncio.wait_for(host.vod_index.async_refresh_summaries(), VOD_SUMMARY_TIMEOUT)
+        except asyncio.TimeoutError:
+            _LOGGER.debug("Host %s: recordings summary not refreshed within %ss.", host.api.host, VOD_SUMMARY_TIMEOUT)
+        except Exception as e:
+            _LOGGER.debug("Host %s: error refreshing the recordings summary: %s", host.api.host, str(e) or type(e).__name__)
+    #endof _async_update_host_summaries()
+
+
+    async def _async_browse_today(self, source: str) -> BrowseMediaSource:
+        """Browse the "today" folder: the cameras which recorded today, of the hosts showing it."""
+        task = self._async_refresh_summaries()
+        if task is not None and self._summaries_updated is None:
+            # Nothing known yet: wait for the searches (each host is bounded by its timeout).
+            await asyncio.shield(task)
+
+        today       = dt_utils.now().date()
+        children    = []
+        for entry_id, entry in self.hass.data[self.domain].items():
+            if not isinstance(entry, dict) or HOST not in entry:
+                continue
+            host: ReolinkHost = entry[HOST]
+            if not host.capabilities.playback_support or not host.playback_today_folder:
+                continue
+            for channel in host.capabilities.channels:
+                summary = host.vod_index.summary(channel)
+                if summary is None or summary["last"] != today.isoformat():
+                    continue
+                title = host.capabilities.camera_name(channel)
+                children.append(BrowseMediaSource(
+                    domain              = self.domain,
+                    identifier          = f"{source}/{entry_id}/{channel}/{today.year}/{today.month}/{today.day}",
+                    media_class         = MEDIA_CLASS_DIRECTORY,
+                    media_content_type  = MEDIA_TYPE_VIDEO,
+                    title               = f"{title} ({summary['today']})" if summary["today"] else title,
+                    can_play            = False,
+                    can_expand          = True,
+                ))
+
+        media = _create_today_folder(self.domain, source)
+        media.children = children
+        return media
+    #endof _async_browse_today()
+
+
     ##############################################################################
     # Methods
     async def _async_browse_media(
@@ -178,15 +226,17 @@ class ReolinkMediaSource(MediaSource):
         """ Actual browse after input validation """
 
         start_date: dt.datetime = None
+        hour: Optional[int]     = None
 
         def create_item(title: str, path: str, thumbnail: bool = False):
-            nonlocal self, entry_id, camera_id, event_id, start_date
+            nonlocal self, entry_id, camera_id, event_id, start_date, hour
 
             if not title or not path:
                 if event_id and "/" in event_id:
                     year, *rest = event_id.split("/", 3)
                     month = rest[0] if len(rest) > 0 else None
                     day = rest[1] if len(rest) > 1 else None
+                    hour = int(rest[2]) if len(rest) > 2 else None
 
                     start_date = dt.datetime.combine(
                         dt.date(
@@ -194,14 +244,14 @@ class ReolinkMediaSource(MediaSource):
                             int(month) if month else 1,
                             int(day) if day else 1,
                         ),
-                        dt.time.min,
+                        dt.time(hour) if hour is not None else dt.time.min,
                         dt_utils.now().tzinfo,
                     )
 
-                    title = f"{start_date.date()}"
+                    title = f"{start_date.date()}" if hour is None else f"{start_date.date()} {hour:02d}:00"
                     path = f"{source}/{entry_id}/{camera_id}/{event_id}"
                 elif host:
-                    title = host.api.camera_name(int(camera_id))
+                    title = host.capabilities.camera_name(int(camera_id))
                     path = f"{source}/{entry_id}/{camera_id}"
                 else:
                     title = self.name
@@ -249,21 +299,30 @@ class ReolinkMediaSource(MediaSource):
         def create_root_children():
             nonlocal host, entry_id, camera_id
 
-            children = []
+            children        = []
+            today_folder    = False
             data: dict[str, dict] = self.hass.data[self.domain]
             for cur_entry_id in data:
                 entry = data[cur_entry_id]
                 if not isinstance(entry, dict) or HOST not in entry:
                     continue
                 host = entry[HOST]
-                if host.api.hdd_info is None:
+                if not host.capabilities.playback_support:
                     continue
+                today_folder = today_folder or host.playback_today_folder
                 entry_id = cur_entry_id
-                for channel in host.api.channels:
+                for channel in host.capabilities.channels:
                     camera_id = channel
                     child = create_item(None, None)
+                    # What the last searches found: the listing never waits for the devices.
+                    summary = host.vod_index.summary(channel)
+                    if summary is not None:
+                        child.title = f"{child.title} ({_summary_title(summary)})"
                     children.append(child)
 
+            if today_folder:
+                children.insert(0, _create_today_folder(self.domain, source))
+            self._async_refresh_summaries()
             return children
         #endof create_root_children()
 
@@ -277,45 +336,46 @@ class ReolinkMediaSource(MediaSource):
             if host.playback_days > 0:
                 start_date -= relativedelta.relativedelta(days = int(host.playback_days))
 
-            # Cleanup older thumbnail files, to not overfill the drive...
-            start_date_timestamp = start_date.timestamp()
-            directory = os.path.join(host.thumbnail_path, f"{camera_id}")
-            if not os.path.isdir(directory):
-                os.makedirs(directory)
-            else:
-                for f in os.listdir(directory):
-                    f = os.path.join(directory, f)
-                    if os.stat(f).st_mtime < start_date_timestamp:
-                        os.remove(f)
-
-            search, _ = await host.api.request_vod_files(int(camera_id), start_date, end_date, True)
-
-            if not search is None:
-                for status in search:
-                    year  = status["year"]
-                    month = status["mon"]
-                    for day, flag in enumerate(status["table"], start = 1):
-                        if flag == "1":
-                            event_id = f"{year}/{month}/{day}"
-                            child = create_item(None, None)
-                            children.append(child)
+            for day in await host.vod_index.async_get_days(int(camera_id), start_date.date()):
+                event_id = f"{day.year}/{day.month}/{day.day}"
+                child = create_item(None, None)
+                children.append(child)
 
             children.reverse()
             return children
         #endof create_day_children()
 
 
+        def create_hour_children(files: list):
+            """Return one folder per hour having recordings, most recent first, with the count of its recordings."""
+            counts: dict[int, int] = dict()
+            for file in files:
+                counts[file["StartTime"]["hour"]] = counts.get(file["StartTime"]["hour"], 0) + 1
+
+            day_id = event_id
+            return [
+                create_item(f"{h:02d}:00 - {h:02d}:59 ({counts[h]})", f"{source}/{entry_id}/{camera_id}/{day_id}/{h}")
+                for h in sorted(counts, reverse = True)
+            ]
+        #endof create_hour_children()
+
+
         async def create_vod_children():
             nonlocal host, start_date, entry_id, camera_id, event_id
 
             children = []
             end_date = dt.datetime.combine(start_date.date(), dt.time.max, start_date.tzinfo)
 
-            directory = os.path.join(host.thumbnail_path, f"{camera_id}")
+            files = await host.vod_index.async_get_files(int(camera_id), start_date.date())
+            if hour is not None:
+                files = [file for file in files if file["StartTime"]["hour"] == hour]
+            elif len(files) > VOD_BROWSE_DAY_LIMIT:
+                # Days of continuous recording: one folder per hour, expanded when browsed.
+                return create_hour_children(files)
 
-            _, files = await host.api.request_vod_files(int(camera_id), start_date, end_date)
+            thumbnails = await host.thumbnails.async_get_thumbnails(int(camera_id))
 
-            for file in files:
+            for file in reversed(files):
                 end_date    = searchtime_to_datetime(file["EndTime"], end_date.tzinfo)
                 start_date  = searchtime_to_datetime(file["StartTime"], end_date.tzinfo)
                 event_id    = str(start_date.timestamp())
@@ -336,17 +396,16 @@ class ReolinkMediaSource(MediaSource):
                 evt_id = f"{entry_id}/{camera_id}/{quote_plus(filename)}"
                 # self._file_cache[evt_id] = filename
 
-                thumbnail_file = os.path.join(directory, f"{event_id}.{THUMBNAIL_EXTENSION}")
                 # Could fill-in possible lack of thumbnails, but these would be just current-time shots...
-                # if not os.path.isfile(thumbnail_file):
+                # if event_id not in thumbnails:
                 #     if camera_id in host.cameras:
                 #         service_data = {
                 #             ATTR_ENTITY_ID: host.cameras[camera_id].entity_id,
-                #             ATTR_FILENAME: thumbnail_file,
+                #             ATTR_FILENAME: host.thumbnails.path(int(camera_id), event_id),
                 #         }
                 #         await self.hass.services.async_call(CAMERA_DOMAIN, SERVICE_SNAPSHOT, service_data, blocking = True)
 
-                thumbnail = os.path.isfile(thumbnail_file)
+                thumbnail = event_id in thumbnails
 
                 time        = start_date.time()
                 duration    = end_date - start_date
@@ -354,8 +413,6 @@ class ReolinkMediaSource(MediaSource):
                 child       = create_item(f"{time} {duration}", f"{source}/{evt_id}", thumbnail)
                 children.append(child)
 
-            children.reverse()
-
             return children
         #endof create_vod_children()
 
@@ -406,10 +463,7 @@ class ReolinkSourceVODView(HomeAssistantView):
             if not token:
                 raise web.HTTPUnauthorized()
 
-            data: dict          = self.hass.data.get(DOMAIN_DATA)
-            data                = data.get(MEDIA_SOURCE) if data else None
-            tokens: list[str]   = data.get(LONG_TOKENS) if data else None
-            if not tokens or not token in tokens:
+            if not async_get_tokens(self.hass, LONG_TOKENS).valid(token):
                 raise web.HTTPUnauthorized()
 
         if not entry_id or not camera_id or not event_id:
@@ -422,7 +476,7 @@ class ReolinkSourceVODView(HomeAssistantView):
             raise web.HTTPNotFound()
 
         file = unquote_plus(event_id)
-        _, url = await host.api.get_vod_source(int(camera_id), file)
+        _, url = await host.async_get_vod_source(int(camera_id), file)
         return web.HTTPTemporaryRedirect(url)
 #endof class ReolinkSourceVODView
 
@@ -450,10 +504,7 @@ class ReolinkSourceThumbnailView(HomeAssistantView):
             if not token:
                 raise web.HTTPUnauthorized()
 
-            data: dict          = self.hass.data.get(DOMAIN_DATA)
-            data                = data.get(MEDIA_SOURCE) if data else None
-            tokens: list[str]   = data.get(SHORT_TOKENS) if data else None
-            if not tokens or not token in tokens:
+            if not async_get_tokens(self.hass, SHORT_TOKENS).valid(token):
                 raise web.HTTPUnauthorized()
 
         if not entry_id or not camera_id or not event_id:
@@ -465,8 +516,9 @@ class ReolinkSourceThumbnailView(HomeAssistantView):
             _LOGGER.debug("Thumbnail view: camera %s:%s not found.", entry_id, camera_id)
             raise web.HTTPNotFound()
 
-        thumbnail = f"{host.thumbnail_path}/{camera_id}/{event_id}.{THUMBNAIL_EXTENSION}"
-        return web.FileResponse(thumbnail)
+        if camera_id.isdigit():
+            host.thumbnails.async_accessed(int(camera_id), event_id)
+        return web.FileResponse(host.thumbnails.path(camera_id, event_id))
 #endof class ReolinkSourceThumbnailView
 
 
@@ -499,5 +551,27 @@ def async_parse_identifier(item: MediaSourceItem) -> tuple[str, str, str, Option
 #endof async_parse_identifier()
 
 
+def _create_today_folder(domain: str, source: str) -> BrowseMediaSource:
+    return BrowseMediaSource(
+        domain              = domain,
+        identifier          = f"{source}/{TODAY_FOLDER}",
+        media_class         = MEDIA_CLASS_DIRECTORY,
+        media_content_type  = MEDIA_TYPE_VIDEO,
+        title               = "Today, all cameras",
+        can_play            = False,
+        can_expand          = True,
+    )
+#endof _create_today_folder()
+
+
+def _summary_title(summary: dict) -> str:
+    if summary["today"]:
+        return f"{summary['today']} today"
+    if summary["last"]:
+        return f"last {summary['last']}"
+    return "no recordings"
+#endof _summary_title()
+
+
 class IncompatibleMediaSource(MediaSourceError):
     """Incompatible media source attributes."""
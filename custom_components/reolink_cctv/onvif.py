@@ -0,0 +1,129 @@
+"""Incremental parser of the ONVIF notifications, sent by Reolink devices to the webhook."""
+
+from typing     import Optional
+from xml.etree  import ElementTree as XML
+
+from reolink_ip.api import (
+    MOTION_DETECTION_TYPE,
+    FACE_DETECTION_TYPE,
+    PERSON_DETECTION_TYPE,
+    VEHICLE_DETECTION_TYPE,
+    PET_DETECTION_TYPE,
+    VISITOR_DETECTION_TYPE
+)
+
+from .const import MOTION_COMMON_TYPE
+
+TAG_NOTIFICATION_MESSAGE    = "{http://docs.oasis-open.org/wsn/b-2}NotificationMessage"
+TAG_TOPIC                   = "{http://docs.oasis-open.org/wsn/b-2}Topic"
+TAG_SIMPLE_ITEM             = "{http://www.onvif.org/ver10/schema}SimpleItem"
+TOPIC_DIALECT               = "http://www.onvif.org/ver10/tev/topicExpression/ConcreteSet"
+
+MOTION_ALARM_TYPE           = "motion_alarm"
+
+# Topic rule -> (name of the SimpleItem holding the state, detection type, whether the rule is an AI one).
+# Any AI rule in a payload means the device sends rich notifications, so its motion is not a "common motion" one.
+ONVIF_RULES: dict[str, tuple[str, str, bool]] = {
+    "Motion":           ("IsMotion",    MOTION_DETECTION_TYPE,  False),
+    "MotionAlarm":      ("State",       MOTION_ALARM_TYPE,      False),
+    "FaceDetect":       ("State",       FACE_DETECTION_TYPE,    True),
+    "PeopleDetect":     ("State",       PERSON_DETECTION_TYPE,  True),
+    "VehicleDetect":    ("State",       VEHICLE_DETECTION_TYPE, True),
+    "DogCatDetect":     ("State",       PET_DETECTION_TYPE,     True),
+    "Visitor":          ("State",       VISITOR_DETECTION_TYPE, False),
+}
+
+# Order the bus events are fired in (after the motion one).
+ONVIF_EVENT_ORDER = (FACE_DETECTION_TYPE, PERSON_DETECTION_TYPE, VEHICLE_DETECTION_TYPE, PET_DETECTION_TYPE, VISITOR_DETECTION_TYPE)
+
+
+##########################################################################################################################################################
+# ONVIF notification parser class
+##########################################################################################################################################################
+class OnvifNotificationParser:
+    """Pull-parser of an ONVIF notification payload, fed chunk-by-chunk while the request body is being received."""
+
+    def __init__(self):
+        self._parser                        = XML.XMLPullParser(events = ("end",))
+        self._rule: Optional[str]           = None
+        self._items: dict[str, str]         = dict()
+        self._states: dict[str, bool]       = dict()
+        self._motion_common_notification    = True
+        self.size                           = 0
+    #endof __init__()
+
+
+    def feed(self, data: bytes):
+        """Parse the next chunk of the payload. Raises ElementTree.ParseError on a malformed payload."""
+        self.size += len(data)
+        self._parser.feed(data)
+        self._read_events()
+    #endof feed()
+
+
+    def close(self) -> list[dict]:
+        """Finish parsing, and return the bus events' data in the order they should be fired."""
+        self._parser.close()
+        self._read_events()
+        return self.events
+    #endof close()
+
+
+    @property
+    def events(self) -> list[dict]:
+        """Return the bus events' data for the states parsed so far."""
+        events = []
+
+        motion = self._states.get(MOTION_DETECTION_TYPE)
+        if motion is None:
+            motion = self._states.get(MOTION_ALARM_TYPE)
+        if motion is not None:
+            if self._motion_common_notification:
+                events.append({MOTION_COMMON_TYPE: motion})
+            else:
+                events.append({MOTION_DETECTION_TYPE: motion})
+
+        for event_type in ONVIF_EVENT_ORDER:
+            state = self._states.get(event_type)
+            if state is not None:
+                events.append({event_type: state})
+
+        return events
+    #endof events
+
+
+    def _read_events(self):
+        # Only "end" events are handled: SimpleItems and Topic always end before their NotificationMessage does,
+        # so the per-message state is collected until the message ends, and reset afterwards.
+        for _, element in self._parser.read_events():
+            tag = element.tag
+            if tag == TAG_SIMPLE_ITEM:
+                name = element.get("Name")
+                if name is not None and name not in self._items:
+                    self._items[name] = element.get("Value")
+            elif tag == TAG_TOPIC:
+                if self._rule is None and element.get("Dialect") == TOPIC_DIALECT and element.text:
+                    self._rule = element.text.rpartition("/")[2]
+            elif tag == TAG_NOTIFICATION_MESSAGE:
+                self._handle_message()
+                self._rule = None
+                self._items.clear()
+                element.clear()
+    #endof _read_events()
+
+
+    def _handle_message(self):
+        rule = ONVIF_RULES.get(self._rule) if self._rule else None
+        if rule is None:
+            return
+
+        item, event_type, is_ai = rule
+        value = self._items.get(item)
+        if value is None:
+            return
+
+        self._states[event_type] = value == "true"
+        if is_ai:
+            self._motion_common_notification = False
+    #endof _handle_message()
+#endof class OnvifNotificationParser
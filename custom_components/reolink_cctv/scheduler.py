@@ -0,0 +1,205 @@
+"""Adaptive scheduling of the states polling of a Reolink host."""
+
+import datetime as dt
+import logging
+import random
+
+from typing import Awaitable, Callable, Optional
+
+import  homeassistant.util.dt                   as dt_util
+from    homeassistant.core                      import CALLBACK_TYPE, HomeAssistant, callback
+from    homeassistant.helpers.event             import async_call_later, async_track_time_interval
+from    homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+POLL_INTERVAL           = 60        # Seconds: while the states change, or after a failed poll.
+POLL_INTERVAL_FAST      = 10        # Seconds: after some activity (a command, a webhook event).
+POLL_INTERVAL_MAX       = 300       # Seconds: the longest back-off, while the states are stable.
+POLL_BACKOFF            = 1.5
+POLL_JITTER             = 0.1
+ACTIVITY_WINDOW         = 120       # Seconds of fast polling after an activity.
+RENEW_INTERVAL          = dt.timedelta(minutes = 1)
+
+REASON_STARTUP          = "startup"
+REASON_ACTIVITY         = "activity"
+REASON_CHANGED          = "changed"
+REASON_FAILED           = "failed"
+REASON_STABLE           = "stable"
+
+
+##########################################################################################################################################################
+# Poll scheduler class
+##########################################################################################################################################################
+class ReolinkPollScheduler:
+    """When to poll the states of the host, instead of a fixed interval.
+
+    The interval backs off while the polls bring no state change, goes back to the base interval when they do (or fail),
+    and is short for a while after some activity: a command sent by an entity, or a webhook event.
+    Every delay is jittered, so the hosts set up together do not poll at the same second.
+    The subscription renewal has its own fixed timer, as its deadline does not depend on the states.
+    """
+
+    def __init__(self, hass: HomeAssistant, host):
+        self._hass                                          = hass
+        self._host                                          = host
+        self._coordinator: Optional[DataUpdateCoordinator]  = None
+        self._renew: Optional[Callable[[], Awaitable]]      = None
+        self._poll_unsub: Optional[CALLBACK_TYPE]           = None
+        self._renew_unsub: Optional[CALLBACK_TYPE]          = None
+        self._interval: float                               = POLL_INTERVAL
+        self._reason: str                                   = REASON_STARTUP
+        self._next_poll: Optional[dt.datetime]              = None
+        self._fast_until: Optional[dt.datetime]             = None
+        self._changed: bool                                 = False
+        self._listeners: list[Callable]                     = list()
+    #endof __init__()
+
+
+    ##############################################################################
+    # Properties
+    @property
+    def interval(self) -> float:
+        """Return the current polling interval, in seconds (before the jitter)."""
+        return self._interval
+
+    @property
+    def reason(self) -> str:
+        """Return why the current interval got chosen."""
+        return self._reason
+
+    @property
+    def next_poll(self) -> Optional[dt.datetime]:
+        return self._next_poll
+
+    @property
+    def fast_until(self) -> Optional[dt.datetime]:
+        return self._fast_until
+
+
+    ##############################################################################
+    # Methods
+    @callback
+    def async_start(self, coordinator: DataUpdateCoordinator, renew: Callable[[], Awaitable]):
+        """Take over the coordinator's polling, and start the renewal timer."""
+        self._coordinator                   = coordinator
+        self._coordinator.update_interval   = None
+        self._renew                         = renew
+
+        if self._renew_unsub is None:
+            self._renew_unsub = async_track_time_interval(self._hass, self._async_renew, RENEW_INTERVAL)
+        # The first poll anywhere within the base interval, to spread the hosts.
+        self._schedule(random.uniform(0, POLL_INTERVAL))
+    #endof async_start()
+
+
+    @callback
+    def async_stop(self):
+        if self._poll_unsub is not None:
+            self._poll_unsub()
+            self._poll_unsub = None
+        if self._renew_unsub is not None:
+            self._renew_unsub()
+            self._renew_unsub = None
+        self._coordinator = None
+    #endof async_stop()
+
+
+    @callback
+    def async_activity(self):
+        """Poll fast for a while: something happened, other states might follow."""
+        now                 = dt_util.utcnow()
+        self._fast_until    = now + dt.timedelta(seconds = ACTIVITY_WINDOW)
+        self._interval      = POLL_INTERVAL_FAST
+        self._reason        = REASON_ACTIVITY
+        if self._coordinator is not None and (self._next_poll is None or self._next_poll > now + dt.timedelta(seconds = POLL_INTERVAL_FAST)):
+            self._schedule(self._jittered(POLL_INTERVAL_FAST))
+        else:
+            self._notify()
+    #endof async_activity()
+
+
+    @callback
+    def async_states_changed(self):
+        """Record that some entity's state changed, so the states are not stable."""
+        self._changed = True
+    #endof async_states_changed()
+
+
+    @callback
+    def async_add_listener(self, action: Callable[[], None]) -> CALLBACK_TYPE:
+        """Register a callback called when the schedule changed. Returns the function to remove it."""
+        self._listeners.append(action)
+
+        @callback
+        def remove_listener():
+            if action in self._listeners:
+                self._listeners.remove(action)
+
+        return remove_listener
+    #endof async_add_listener()
+
+
+    async def _async_poll(self, now = None):
+        self._poll_unsub = None
+        coordinator = self._coordinator
+        if coordinator is None:
+            return
+
+        await coordinator.async_refresh()
+        # After the state writes the poll caused (they are flushed on the next loop iteration), to see whether it changed anything.
+        self._hass.loop.call_soon(self._schedule_next)
+    #endof _async_poll()
+
+
+    @callback
+    def _schedule_next(self):
+        if self._coordinator is None or self._poll_unsub is not None:
+            return
+
+        now = dt_util.utcnow()
+        if self._fast_until is not None and now < self._fast_until:
+            self._interval, self._reason = POLL_INTERVAL_FAST, REASON_ACTIVITY
+        elif not self._coordinator.last_update_success:
+            self._interval, self._reason = POLL_INTERVAL, REASON_FAILED
+        elif self._changed:
+            self._interval, self._reason = POLL_INTERVAL, REASON_CHANGED
+        else:
+            self._interval, self._reason = min(max(self._interval, POLL_INTERVAL) * POLL_BACKOFF, POLL_INTERVAL_MAX), REASON_STABLE
+        self._changed = False
+
+        self._schedule(self._jittered(self._interval))
+    #endof _schedule_next()
+
+
+    @callback
+    def _schedule(self, delay: float):
+        if self._poll_unsub is not None:
+            self._poll_unsub()
+        self._next_poll     = dt_util.utcnow() + dt.timedelta(seconds = delay)
+        self._poll_unsub    = async_call_later(self._hass, delay, self._async_poll)
+        _LOGGER.debug("Host %s: next states poll in %.1fs (%s).", self._host.api.host, delay, self._reason)
+        self._notify()
+    #endof _schedule()
+
+
+    async def _async_renew(self, now = None):
+        if self._renew is None or not self._host.initialized:
+            return
+        try:
+            await self._renew()
+        except Exception as e:
+            _LOGGER.error("Host %s: error renewing the subscription: %s", self._host.api.host, str(e) or type(e).__name__)
+    #endof _async_renew()
+
+
+    @staticmethod
+    def _jittered(delay: float) -> float:
+        return delay * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+
+
+    def _notify(self):
+        for action in self._listeners:
+            action()
+    #endof _notify()
+#endof class ReolinkPollScheduler
@@ -1,30 +1,40 @@
 """This component provides support for Reolink IP VoD support."""
 import datetime as dt
 import logging
-import os
 
+from typing                             import Optional
 from urllib.parse                       import quote_plus
 from dataclasses                        import dataclass
 from dateutil                           import relativedelta
 from homeassistant.components.camera    import ATTR_FILENAME, DOMAIN as CAMERA_DOMAIN, SERVICE_SNAPSHOT
 
+import  voluptuous                      as vol
 import  homeassistant.util.dt           as dt_utils
-from    homeassistant.core              import CALLBACK_TYPE, HomeAssistant
+from    homeassistant.core              import HomeAssistant, ServiceCall, callback
 from    homeassistant.config_entries    import ConfigEntry
-from    homeassistant.components.sensor import DEVICE_CLASS_TIMESTAMP, SensorEntity
-from    homeassistant.const             import ATTR_ENTITY_ID
+from    homeassistant.components.sensor import DEVICE_CLASS_TIMESTAMP, STATE_CLASS_TOTAL_INCREASING, SensorEntity
+from    homeassistant.const             import ATTR_ENTITY_ID, DATA_BYTES, ENTITY_CATEGORY_DIAGNOSTIC, TIME_MILLISECONDS, TIME_SECONDS
+from    homeassistant.components.notify import ATTR_MESSAGE, ATTR_TITLE, DOMAIN as NOTIFY_DOMAIN
+from    homeassistant.helpers.debounce  import Debouncer
+from    homeassistant.helpers.network   import get_url
+from    homeassistant.helpers           import config_validation as cv, entity_platform
+from    homeassistant.helpers.start     import async_at_start
 
 from reolink_ip.api import MOTION_DETECTION_TYPE
 
 from .entity    import ReolinkCoordinatorEntity
 from .host      import ReolinkHost, searchtime_to_datetime
+from .latency   import LATENCY_STAGES, STAGE_TOTAL
+from .tokens    import async_get_tokens
 from .typings   import VoDRecord, VoDRecordThumbnail
 from .const     import (
     HOST,
     DOMAIN,
     DOMAIN_DATA,
     LAST_RECORD,
-    THUMBNAIL_EXTENSION,
+    LAST_RECORD_REFRESH_COOLDOWN,
+    LONG_TOKENS,
+    SERVICE_NOTIFY_VIDEO_LINK,
     THUMBNAIL_URL,
     VOD_URL,
     MOTION_COMMON_TYPE,
@@ -32,24 +42,51 @@ from .const     import (
 
 _LOGGER = logging.getLogger(__name__)
 
+THUMBNAILS_SIZE     = "size"
+THUMBNAILS_COUNT    = "count"
+
 
 ##########################################################################################################################################################
 # ENTRY SETUP
 ##########################################################################################################################################################
 async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices):
     """Set up the Reolink IP Cameras' last-record sensors."""
+    platform = entity_platform.current_platform.get()
+    platform.async_register_entity_service(
+        SERVICE_NOTIFY_VIDEO_LINK,
+        {
+            vol.Required("service"): cv.string,
+            vol.Optional("message", default = "{video_url}"): cv.string,
+            vol.Optional("title"): cv.string
+        },
+        async_notify_video_link,
+    )
+
     devices = []
     host: ReolinkHost = hass.data[DOMAIN][config_entry.entry_id][HOST]
 
-    # TODO : add playback (based off of hdd_info) to api capabilities
-    if host.api.hdd_info is not None:
-        for c in host.api.channels:
+    devices.append(ConnectionsSensor(hass, config_entry))
+    devices.append(PollIntervalSensor(hass, config_entry))
+    for stage in LATENCY_STAGES:
+        devices.append(LatencySensor(hass, config_entry, stage))
+
+    if host.capabilities.playback_support:
+        for c in host.capabilities.channels:
             devices.append(LastRecordSensor(hass, config_entry, c))
+        devices.append(ThumbnailsSensor(hass, config_entry, THUMBNAILS_SIZE))
+        devices.append(ThumbnailsSensor(hass, config_entry, THUMBNAILS_COUNT))
 
-    async_add_devices(devices, update_before_add = True)
+    async_add_devices(devices, update_before_add = host.initialized)
 #endof async_setup_entry()
 
 
+async def async_notify_video_link(entity: SensorEntity, call: ServiceCall):
+    """Send the link of the last record of one of the targeted last-record sensors."""
+    if isinstance(entity, LastRecordSensor):
+        await entity.async_notify_video_link(call.data["service"], call.data["message"], call.data.get("title"))
+#endof async_notify_video_link()
+
+
 ##########################################################################################################################################################
 # Last record sensor class
 ##########################################################################################################################################################
@@ -70,8 +107,10 @@ class LastRecordSensor(ReolinkCoordinatorEntity, SensorEntity):
 
         self._channel                       = channel
         self._attrs                         = _Attrs()
-        self._bus_listener: CALLBACK_TYPE   = None
         self._entry_id                      = config.entry_id
+        self._days_checked: Optional[dt.date] = None
+        self._last_file: Optional[tuple]    = None
+        self._refresh_debouncer             = Debouncer(hass, _LOGGER, cooldown = LAST_RECORD_REFRESH_COOLDOWN, immediate = True, function = self._update_last_record)
     #endof __init__()
 
 
@@ -83,7 +122,7 @@ class LastRecordSensor(ReolinkCoordinatorEntity, SensorEntity):
 
     @property
     def name(self):
-        return f"{self._host.api.camera_name(self._channel)} last record"
+        return f"{self._host.capabilities.camera_name(self._channel)} last record"
 
     @property
     def device_class(self):
@@ -142,75 +181,97 @@ class LastRecordSensor(ReolinkCoordinatorEntity, SensorEntity):
     # Methods
     async def async_added_to_hass(self) -> None:
         await super().async_added_to_hass()
-        self._bus_listener = self.hass.bus.async_listen(self._host.event_id, self.handle_event)
+        for event_type in (MOTION_DETECTION_TYPE, MOTION_COMMON_TYPE):
+            self.async_on_remove(self._host.async_add_event_listener(event_type, self._channel, self.handle_event))
+        self.async_on_remove(self._refresh_debouncer.async_cancel)
+        # The first VoD search is slow, and not needed for the startup: it is done once Home Assistant has started.
+        self.async_on_remove(async_at_start(self._hass, self._async_at_start))
         #self._hass.async_add_job(self._update_last_record)
     #endof async_added_to_hass()
 
 
-    async def async_will_remove_from_hass(self):
-        if self._bus_listener:
-            self._bus_listener()
-            self._bus_listener = None
-        await super().async_will_remove_from_hass()
-    #endof async_will_remove_from_hass()
+    async def _async_at_start(self, hass: HomeAssistant):
+        await self._refresh_debouncer.async_call()
+    #endof _async_at_start()
+
+
+    async def async_notify_video_link(self, service: str, message: str, title: Optional[str] = None):
+        """Send the link of the last record through a notify service, with a long-lived token so it works outside of a Home Assistant session.
+
+        The token is only issued on request: it would otherwise end up in the state attributes, and so in the recorder's history.
+        """
+        last_record = self._attrs.last_record
+        if not last_record or not last_record.url:
+            _LOGGER.warning("No last record to send for camera %s.", self._host.capabilities.camera_name(self._channel))
+            return
+
+        video_url   = f"{get_url(self._hass)}{last_record.url}?token={async_get_tokens(self._hass, LONG_TOKENS).current()}"
+        data        = {ATTR_MESSAGE: message.replace("{video_url}", video_url)}
+        if title:
+            data[ATTR_TITLE] = title
+        await self._hass.services.async_call(NOTIFY_DOMAIN, service.removeprefix(f"{NOTIFY_DOMAIN}."), data, blocking = True)
+    #endof async_notify_video_link()
 
 
     async def request_refresh(self):
         """ Force an update of the sensor """
         await super().request_refresh()
-        self._hass.async_add_job(self._update_last_record)
+        self._hass.async_create_task(self._refresh_debouncer.async_call())
     #endof request_refresh()
 
 
     async def async_update(self):
         """ Polling update """
         await super().async_update()
-        self._hass.async_add_job(self._update_last_record)
+        self._hass.async_create_task(self._refresh_debouncer.async_call())
     #endof async_update()
 
 
     async def _update_last_record(self):
-        if not self.hass or not self.enabled:
+        if not self.hass or not self.enabled or not self._hass.is_running:
             return
 
-        end = dt_utils.now()
-        start   = self._attrs.most_recent_day
-        if not start:
-            start = dt.datetime.combine(end.date(), dt.time.min)
+        index   = self._host.vod_index
+        now     = dt_utils.now()
+        today   = now.date()
+
+        # The recorded days only need to be searched once a day: in-between, new recordings can only be today's files.
+        if self._days_checked != today or self._attrs.most_recent_day is None:
+            start = today
             if self._host.playback_days > 0:
                 start -= relativedelta.relativedelta(days = int(self._host.playback_days))
 
-        search, _ = await self._host.api.request_vod_files(self._channel, start, end, True)
-        if not search or len(search) < 1:
-            return
+            days = await index.async_get_days(self._channel, start)
+            if not days:
+                return
 
-        entry = search[0]
-        self._attrs.oldest_day = dt.datetime(
-            entry["year"],
-            entry["mon"],
-            next((i for (i, e) in enumerate(entry["table"], start = 1) if e == "1")),
-            tzinfo = end.tzinfo,
-        )
-        entry = search[-1]
-        start = self._attrs.most_recent_day = dt.datetime(
-            entry["year"],
-            entry["mon"],
-            len(entry["table"])
-            - next(
-                (
-                    i
-                    for (i, e) in enumerate(reversed(entry["table"]), start = 0)
-                    if e == "1"
-                )
-            ),
-            tzinfo = end.tzinfo,
-        )
-        end = dt.datetime.combine(start.date(), dt.time.max, tzinfo = end.tzinfo)
-        _, files = await self._host.api.request_vod_files(self._channel, start, end)
-        file = files[-1] if files and len(files) > 0 else None
+            self._days_checked              = today
+            self._attrs.oldest_day          = dt.datetime.combine(days[0], dt.time.min, now.tzinfo)
+            self._attrs.most_recent_day     = dt.datetime.combine(days[-1], dt.time.min, now.tzinfo)
+
+        # Today's files are searched incrementally by the index, from the last known one.
+        day     = today if self._attrs.last_record is not None else self._attrs.most_recent_day.date()
+        files   = await index.async_get_files(self._channel, day)
+        file    = files[-1] if files and len(files) > 0 else None
         if file is None:
             return
 
+        if day > self._attrs.most_recent_day.date():
+            self._attrs.most_recent_day = dt.datetime.combine(day, dt.time.min, now.tzinfo)
+
+        start   = self._attrs.most_recent_day
+        key     = (file.get("name"), str(file.get("PlaybackTime")), str(file["StartTime"]))
+        if key == self._last_file and self._attrs.last_record is not None:
+            # Same file as last time (possibly still recording): only its duration can have changed.
+            last    = self._attrs.last_record
+            end     = searchtime_to_datetime(file["EndTime"], start.tzinfo)
+            if end - last.start == last.duration:
+                return
+            last.duration = end - last.start
+            self._host.async_schedule_state_write(self)
+            return
+        self._last_file = key
+
         filename = None
         if self._host.api.is_nvr:
             element = file.get("PlaybackTime", None)
@@ -229,25 +290,22 @@ class LastRecordSensor(ReolinkCoordinatorEntity, SensorEntity):
         last    = self._attrs.last_record = VoDRecord(str(start.timestamp()), start, end - start, filename)
 
         last.url = VOD_URL.format(entry_id = self._entry_id, camera_id = self._channel, event_id = quote_plus(filename))
-        _, last.cam_record_url = await self._host.api.get_vod_source(self._channel, filename, True)
+        _, last.cam_record_url = await self._host.async_get_vod_source(self._channel, filename, True)
 
-        thumbnail = last.thumbnail = VoDRecordThumbnail(
+        thumbnails  = self._host.thumbnails
+        thumbnail   = last.thumbnail = VoDRecordThumbnail(
             THUMBNAIL_URL.format(entry_id = self._entry_id, camera_id = self._channel, event_id = last.event_id),
-            path = os.path.join(self._host.thumbnail_path, f"{self._channel}/{last.event_id}.{THUMBNAIL_EXTENSION}")
+            path = thumbnails.path(self._channel, last.event_id)
         )
 
-        if not os.path.isfile(thumbnail.path):
-            directory = os.path.join(self._host.thumbnail_path, f"{self._channel}")
-            if not os.path.isdir(directory):
-                os.makedirs(directory)
-            if self._channel in self._host.cameras:
-                service_data = {
-                    ATTR_ENTITY_ID: self._host.cameras[self._channel].entity_id,
-                    ATTR_FILENAME: thumbnail.path,
-                }
-                await self._hass.services.async_call(CAMERA_DOMAIN, SERVICE_SNAPSHOT, service_data, blocking = True)
-
-        thumbnail.exists = os.path.isfile(thumbnail.path)
+        thumbnail.exists = await thumbnails.async_exists(self._channel, last.event_id)
+        if not thumbnail.exists and self._channel in self._host.cameras:
+            service_data = {
+                ATTR_ENTITY_ID: self._host.cameras[self._channel].entity_id,
+                ATTR_FILENAME: await thumbnails.async_prepare(self._channel, last.event_id),
+            }
+            await self._hass.services.async_call(CAMERA_DOMAIN, SERVICE_SNAPSHOT, service_data, blocking = True)
+            thumbnail.exists = await thumbnails.async_added(self._channel, last.event_id)
 
         data: dict          = self._hass.data.setdefault(DOMAIN_DATA, {})
         data                = data.setdefault(self._host.unique_id, {})
@@ -257,7 +315,7 @@ class LastRecordSensor(ReolinkCoordinatorEntity, SensorEntity):
 
         if not self.hass or not self.enabled:
             return
-        self.async_schedule_update_ha_state()
+        self._host.async_schedule_state_write(self)
     #endof _update_last_record()
 
 
@@ -265,6 +323,222 @@ class LastRecordSensor(ReolinkCoordinatorEntity, SensorEntity):
         """Handle incoming event for VoD update"""
         if (MOTION_DETECTION_TYPE not in event.data or not event.data[MOTION_DETECTION_TYPE]) and (MOTION_COMMON_TYPE not in event.data or not event.data[MOTION_COMMON_TYPE]):
             return
-        await self._hass.async_add_job(self._update_last_record)
+        await self._refresh_debouncer.async_call()
     #endof handle_event()
 #endof class LastRecordSensor
+
+
+##########################################################################################################################################################
+# Thumbnails sensor class
+##########################################################################################################################################################
+class ThumbnailsSensor(ReolinkCoordinatorEntity, SensorEntity):
+    """Disk usage of the VoD thumbnails of the host: their total size, or their number."""
+
+    def __init__(self, hass: HomeAssistant, config: ConfigEntry, kind: str):
+        ReolinkCoordinatorEntity.__init__(self, hass, config)
+        SensorEntity.__init__(self)
+
+        self._kind = kind
+    #endof __init__()
+
+
+    ##########################################################################
+    # Properties
+    @property
+    def unique_id(self):
+        return f"reolink_thumbnails_{self._kind}_{self._host.unique_id}"
+
+    @property
+    def name(self):
+        return f"{self._host.capabilities.nvr_name} thumbnails {self._kind}"
+
+    @property
+    def state(self):
+        if self._kind == THUMBNAILS_SIZE:
+            return self._host.thumbnails.size
+        return self._host.thumbnails.count
+
+    @property
+    def unit_of_measurement(self):
+        return DATA_BYTES if self._kind == THUMBNAILS_SIZE else None
+
+    @property
+    def icon(self):
+        return "mdi:harddisk" if self._kind == THUMBNAILS_SIZE else "mdi:image-multiple"
+
+    @property
+    def entity_category(self):
+        return ENTITY_CATEGORY_DIAGNOSTIC
+
+    @property
+    def available(self) -> bool:
+        return True
+
+
+    ##########################################################################
+    # Methods
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self._host.thumbnails.async_add_listener(self._handle_thumbnails_update))
+    #endof async_added_to_hass()
+
+
+    @callback
+    def _handle_thumbnails_update(self):
+        self._host.async_schedule_state_write(self)
+    #endof _handle_thumbnails_update()
+#endof class ThumbnailsSensor
+
+
+##########################################################################################################################################################
+# Connections sensor class
+##########################################################################################################################################################
+class ConnectionsSensor(ReolinkCoordinatorEntity, SensorEntity):
+    """Connections opened to the host through the shared pool (TLS handshakes for HTTPS), with the pool usage as attributes."""
+
+    ##########################################################################
+    # Properties
+    @property
+    def unique_id(self):
+        return f"reolink_connections_{self._host.unique_id}"
+
+    @property
+    def name(self):
+        return f"{self._host.capabilities.nvr_name} connections"
+
+    @property
+    def state(self):
+        return self._host.connection_metrics.get("connections")
+
+    @property
+    def state_class(self):
+        return STATE_CLASS_TOTAL_INCREASING
+
+    @property
+    def icon(self):
+        return "mdi:lan-connect"
+
+    @property
+    def entity_category(self):
+        return ENTITY_CATEGORY_DIAGNOSTIC
+
+    @property
+    def extra_state_attributes(self):
+        return {k: v for k, v in self._host.connection_metrics.items() if k != "connections"}
+#endof class ConnectionsSensor
+
+
+##########################################################################################################################################################
+# Poll interval sensor class
+##########################################################################################################################################################
+class PollIntervalSensor(ReolinkCoordinatorEntity, SensorEntity):
+    """Current interval of the states polling of the host, with why it got chosen and when the next poll is."""
+
+    ##########################################################################
+    # Properties
+    @property
+    def unique_id(self):
+        return f"reolink_poll_interval_{self._host.unique_id}"
+
+    @property
+    def name(self):
+        return f"{self._host.capabilities.nvr_name} poll interval"
+
+    @property
+    def state(self):
+        return round(self._host.poll_scheduler.interval, 1)
+
+    @property
+    def unit_of_measurement(self):
+        return TIME_SECONDS
+
+    @property
+    def icon(self):
+        return "mdi:timer-sync-outline"
+
+    @property
+    def entity_category(self):
+        return ENTITY_CATEGORY_DIAGNOSTIC
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @property
+    def extra_state_attributes(self):
+        scheduler = self._host.poll_scheduler
+        return {
+            "reason":       scheduler.reason,
+            "next_poll":    scheduler.next_poll.isoformat() if scheduler.next_poll is not None else None,
+            "fast_until":   scheduler.fast_until.isoformat() if scheduler.fast_until is not None else None,
+        }
+
+
+    ##########################################################################
+    # Methods
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self._host.poll_scheduler.async_add_listener(self._handle_schedule_update))
+    #endof async_added_to_hass()
+
+
+    @callback
+    def _handle_schedule_update(self):
+        self._host.async_schedule_state_write(self)
+    #endof _handle_schedule_update()
+#endof class PollIntervalSensor
+
+
+##########################################################################################################################################################
+# Latency sensor class
+##########################################################################################################################################################
+class LatencySensor(ReolinkCoordinatorEntity, SensorEntity):
+    """95th percentile of a stage of the webhook-to-state path of the host, with its histogram as attributes.
+
+    Updated with the states polling, not with each event, not to add state writes to the path it measures.
+    Only the total is enabled by default.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: ConfigEntry, stage: str):
+        ReolinkCoordinatorEntity.__init__(self, hass, config)
+        SensorEntity.__init__(self)
+
+        self._stage                                 = stage
+        self._attr_entity_registry_enabled_default  = stage == STAGE_TOTAL
+    #endof __init__()
+
+
+    ##########################################################################
+    # Properties
+    @property
+    def unique_id(self):
+        return f"reolink_latency_{self._stage}_{self._host.unique_id}"
+
+    @property
+    def name(self):
+        return f"{self._host.capabilities.nvr_name} {self._stage} latency"
+
+    @property
+    def state(self):
+        return self._host.latency.histogram(self._stage).as_dict()["p95"]
+
+    @property
+    def unit_of_measurement(self):
+        return TIME_MILLISECONDS
+
+    @property
+    def icon(self):
+        return "mdi:timer-outline"
+
+    @property
+    def entity_category(self):
+        return ENTITY_CATEGORY_DIAGNOSTIC
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @property
+    def extra_state_attributes(self):
+        return {k: v for k, v in self._host.latency.histogram(self._stage).as_dict().items() if k != "p95"}
+#endof class LatencySensor
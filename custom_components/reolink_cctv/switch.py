@@ -3,12 +3,15 @@ import asyncio
 import logging
 from   typing import Optional
 
-from homeassistant.core                 import HomeAssistant
+import voluptuous as vol
+
+from homeassistant.core                 import HomeAssistant, ServiceCall
 from homeassistant.components.switch    import SwitchDeviceClass
+from homeassistant.helpers              import config_validation as cv, entity_platform
 from homeassistant.helpers.entity       import ToggleEntity, EntityCategory
 
 from .host      import ReolinkHost
-from .const     import HOST, DOMAIN
+from .const     import HOST, DOMAIN, SERVICE_BULK_SET
 from .entity    import ReolinkCoordinatorEntity
 
 _LOGGER = logging.getLogger(__name__)
@@ -20,12 +23,24 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices):
     """Set up the Reolink IP Camera switches."""
 
+    # The switches are commanded concurrently: the commands to the same host get merged into one request.
+    platform = entity_platform.current_platform.get()
+    platform.async_register_entity_service(
+        SERVICE_BULK_SET,
+        {
+            vol.Required("state"): cv.boolean
+        },
+        async_bulk_set,
+    )
+
     devices = []
     host: ReolinkHost = hass.data[DOMAIN][config_entry.entry_id][HOST]
 
+    # The channels' capabilities are independent requests: load them concurrently.
+    channels_capabilities: list[list[str]] = await asyncio.gather(*[host.capabilities.async_get_switchable_capabilities(c) for c in host.capabilities.channels])
+
     global_added = False
-    for channel in host.api.channels:
-        capabilities: list[str] = await host.api.get_switchable_capabilities(channel)
+    for channel, capabilities in zip(host.capabilities.channels, channels_capabilities):
         for capability in capabilities:
             if capability == "audio":
                 devices.append(AudioSwitch(hass, config_entry, channel))
@@ -52,15 +67,26 @@ async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices
             global_added = True
     #for channel in host.api.channels:
 
-    async_add_devices(devices, update_before_add = True)
+    async_add_devices(devices, update_before_add = host.initialized)
 #endof async_setup_entry()
 
 
+async def async_bulk_set(entity: ToggleEntity, call: ServiceCall):
+    """Switch one of the targeted switches on/off."""
+    if call.data["state"]:
+        await entity.async_turn_on()
+    else:
+        await entity.async_turn_off()
+#endof async_bulk_set()
+
+
 ##########################################################################################################################################################
 # FTP
 ##########################################################################################################################################################
 class FTPSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
+    state_commands = ("GetFtp",)
+
     def __init__(self, hass, config, channel: Optional[int] = None):
         ReolinkCoordinatorEntity.__init__(self, hass, config)
         ToggleEntity.__init__(self)
@@ -82,9 +108,9 @@ class FTPSwitch(ReolinkCoordinatorEntity, ToggleEntity):
     @property
     def name(self):
         if self._channel is None:
-            return f"{self._host.api.nvr_name} FTP"
+            return f"{self._host.capabilities.nvr_name} FTP"
         else:
-            cam_name = self._host.api.camera_name(self._channel)
+            cam_name = self._host.capabilities.camera_name(self._channel)
             return f"{cam_name} FTP"
     #endof name
 
@@ -92,6 +118,8 @@ class FTPSwitch(ReolinkCoordinatorEntity, ToggleEntity):
     @property
     def is_on(self):
         """Camera Motion FTP upload Status."""
+        if self._optimistic_state is not None:
+            return self._optimistic_state
         return self._host.api.ftp_enabled(self._channel)
     #endof is_on
 
@@ -112,14 +140,16 @@ class FTPSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
     async def async_turn_on(self, **kwargs):
         """Enable motion ftp recording."""
-        await self._host.api.set_ftp(self._channel, True)
+        if await self._host.api.set_ftp(self._channel, True):
+            self.async_set_optimistic_state(True)
         await self.request_refresh()
     #endof async_turn_on()
 
 
     async def async_turn_off(self, **kwargs):
         """Disable motion ftp recording."""
-        await self._host.api.set_ftp(self._channel, False)
+        if await self._host.api.set_ftp(self._channel, False):
+            self.async_set_optimistic_state(False)
         await self.request_refresh()
     #endof async_turn_off()
 #endof class FTPSwitch
@@ -130,6 +160,8 @@ class FTPSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 ##########################################################################################################################################################
 class EmailSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
+    state_commands = ("GetEmail",)
+
     def __init__(self, hass, config, channel: Optional[int] = None):
         ReolinkCoordinatorEntity.__init__(self, hass, config)
         ToggleEntity.__init__(self)
@@ -151,9 +183,9 @@ class EmailSwitch(ReolinkCoordinatorEntity, ToggleEntity):
     @property
     def name(self):
         if self._channel is None:
-            return f"{self._host.api.nvr_name} Email"
+            return f"{self._host.capabilities.nvr_name} Email"
         else:
-            cam_name = self._host.api.camera_name(self._channel)
+            cam_name = self._host.capabilities.camera_name(self._channel)
             return f"{cam_name} Email"
     #endof name
 
@@ -161,6 +193,8 @@ class EmailSwitch(ReolinkCoordinatorEntity, ToggleEntity):
     @property
     def is_on(self):
         """Camera Motion email upload Status."""
+        if self._optimistic_state is not None:
+            return self._optimistic_state
         return self._host.api.email_enabled(self._channel)
     #endof is_on
 
@@ -181,14 +215,16 @@ class EmailSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
     async def async_turn_on(self, **kwargs):
         """Enable motion email notification."""
-        await self._host.api.set_email(self._channel, True)
+        if await self._host.api.set_email(self._channel, True):
+            self.async_set_optimistic_state(True)
         await self.request_refresh()
     #endof async_turn_on()
 
 
     async def async_turn_off(self, **kwargs):
         """Disable motion email notification."""
-        await self._host.api.set_email(self._channel, False)
+        if await self._host.api.set_email(self._channel, False):
+            self.async_set_optimistic_state(False)
         await self.request_refresh()
     #endof async_turn_off()
 #endof class EmailSwitch
@@ -199,6 +235,8 @@ class EmailSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 ##########################################################################################################################################################
 class IRLightsSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
+    state_commands = ("GetIrLights",)
+
     def __init__(self, hass, config, channel: Optional[int] = None):
         ReolinkCoordinatorEntity.__init__(self, hass, config)
         ToggleEntity.__init__(self)
@@ -220,15 +258,17 @@ class IRLightsSwitch(ReolinkCoordinatorEntity, ToggleEntity):
     @property
     def name(self):
         if self._channel is None:
-            return f"{self._host.api.nvr_name} IR lights"
+            return f"{self._host.capabilities.nvr_name} IR lights"
         else:
-            cam_name = self._host.api.camera_name(self._channel)
+            cam_name = self._host.capabilities.camera_name(self._channel)
             return f"{cam_name} IR lights"
     #endof name
 
 
     @property
     def is_on(self):
+        if self._optimistic_state is not None:
+            return self._optimistic_state
         return self._host.api.ir_enabled(0 if self._channel is None else self._channel)
     #endof is_on
 
@@ -249,14 +289,16 @@ class IRLightsSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
     async def async_turn_on(self, **kwargs):
         """Enable motion ir lights."""
-        await self._host.api.set_ir_lights(0 if self._channel is None else self._channel, True)
+        if await self._host.async_set_switch("irLights", 0 if self._channel is None else self._channel, True):
+            self.async_set_optimistic_state(True)
         await self.request_refresh()
     #endof async_turn_on()
 
 
     async def async_turn_off(self, **kwargs):
         """Disable motion ir lights."""
-        await self._host.api.set_ir_lights(0 if self._channel is None else self._channel, False)
+        if await self._host.async_set_switch("irLights", 0 if self._channel is None else self._channel, False):
+            self.async_set_optimistic_state(False)
         await self.request_refresh()
     #endof async_turn_off()
 #endof class IRLightsSwitch
@@ -267,6 +309,8 @@ class IRLightsSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 ##########################################################################################################################################################
 class DoorbellLightSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
+    state_commands = ("GetPowerLed",)
+
     def __init__(self, hass, config, channel: Optional[int] = None):
         ReolinkCoordinatorEntity.__init__(self, hass, config)
         ToggleEntity.__init__(self)
@@ -288,15 +332,17 @@ class DoorbellLightSwitch(ReolinkCoordinatorEntity, ToggleEntity):
     @property
     def name(self):
         if self._channel is None:
-            return f"{self._host.api.nvr_name} doorbell light"
+            return f"{self._host.capabilities.nvr_name} doorbell light"
         else:
-            cam_name = self._host.api.camera_name(self._channel)
+            cam_name = self._host.capabilities.camera_name(self._channel)
             return f"{cam_name} doorbell light"
     #endof name
 
 
     @property
     def is_on(self):
+        if self._optimistic_state is not None:
+            return self._optimistic_state
         return self._host.api.doorbell_light_enabled(0 if self._channel is None else self._channel)
     #endof is_on
 
@@ -317,14 +363,16 @@ class DoorbellLightSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
     async def async_turn_on(self, **kwargs):
         """Enable doorbell light."""
-        await self._host.api.set_power_led(0 if self._channel is None else self._channel, True, True)
+        if await self._host.async_set_switch("doorbellLight", 0 if self._channel is None else self._channel, True):
+            self.async_set_optimistic_state(True)
         await self.request_refresh()
     #endof async_turn_on()
 
 
     async def async_turn_off(self, **kwargs):
         """Disable doorbell light."""
-        await self._host.api.set_power_led(0 if self._channel is None else self._channel, True, False)
+        if await self._host.async_set_switch("doorbellLight", 0 if self._channel is None else self._channel, False):
+            self.async_set_optimistic_state(False)
         await self.request_refresh()
     #endof async_turn_off()
 #endof class DoorbellLightSwitch
@@ -336,6 +384,8 @@ class DoorbellLightSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 class SpotLightSwitch(ReolinkCoordinatorEntity, ToggleEntity):
     """An implementation of a Reolink IP camera spotlight (WhiteLed) switch"""
 
+    state_commands = ("GetWhiteLed",)
+
     def __init__(self, hass, config, channel: Optional[int] = None):
         ReolinkCoordinatorEntity.__init__(self, hass, config)
         ToggleEntity.__init__(self)
@@ -357,15 +407,17 @@ class SpotLightSwitch(ReolinkCoordinatorEntity, ToggleEntity):
     @property
     def name(self):
         if self._channel is None:
-            return f"{self._host.api.nvr_name} Spotlight"
+            return f"{self._host.capabilities.nvr_name} Spotlight"
         else:
-            cam_name = self._host.api.camera_name(self._channel)
+            cam_name = self._host.capabilities.camera_name(self._channel)
             return f"{cam_name} Spotlight"
     #endof name
 
 
     @property
     def is_on(self):
+        if self._optimistic_state is not None:
+            return self._optimistic_state
         return self._host.api.whiteled_enabled(0 if self._channel is None else self._channel)
     #endof is_on
 
@@ -389,14 +441,16 @@ class SpotLightSwitch(ReolinkCoordinatorEntity, ToggleEntity):
         """Enable spotlight."""
         # Uses a call to a simple turn on routine which sets night mode on, auto, 100% bright.
 
-        await self._host.api.set_spotlight(0 if self._channel is None else self._channel, True)
+        if await self._host.async_set_switch("spotlight", 0 if self._channel is None else self._channel, True):
+            self.async_set_optimistic_state(True)
         await self.request_refresh()
     #endof async_turn_on()
 
 
     async def async_turn_off(self, **kwargs):
         """Disable spotlight."""
-        await self._host.api.set_spotlight(0 if self._channel is None else self._channel, False)
+        if await self._host.async_set_switch("spotlight", 0 if self._channel is None else self._channel, False):
+            self.async_set_optimistic_state(False)
         await self.request_refresh()
     #endof async_turn_off()
 
@@ -434,6 +488,8 @@ class SpotLightSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 ##########################################################################################################################################################
 class SirenSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
+    state_commands = ("GetAudioAlarm",)
+
     def __init__(self, hass, config, channel: Optional[int] = None):
         ReolinkCoordinatorEntity.__init__(self, hass, config)
         ToggleEntity.__init__(self)
@@ -455,15 +511,17 @@ class SirenSwitch(ReolinkCoordinatorEntity, ToggleEntity):
     @property
     def name(self):
         if self._channel is None:
-            return f"{self._host.api.nvr_name} Siren"
+            return f"{self._host.capabilities.nvr_name} Siren"
         else:
-            cam_name = self._host.api.camera_name(self._channel)
+            cam_name = self._host.capabilities.camera_name(self._channel)
             return f"{cam_name} Siren"
     #endof name
 
 
     @property
     def is_on(self):
+        if self._optimistic_state is not None:
+            return self._optimistic_state
         # return self._host.api.audio_alarm_state
         return self._host.api.audio_alarm_enabled(self._channel)
     #endof is_on
@@ -488,14 +546,16 @@ class SirenSwitch(ReolinkCoordinatorEntity, ToggleEntity):
     async def async_turn_on(self, **kwargs):
         """Turn On Siren."""
         # Uses call to simple turn on routine which sets night mode on, auto, 100% bright.
-        await self._host.api.set_siren(0 if self._channel is None else self._channel, True)
+        if await self._host.async_set_switch("siren", 0 if self._channel is None else self._channel, True):
+            self.async_set_optimistic_state(True)
         await self.request_refresh()
     #endof async_turn_on()
 
 
     async def async_turn_off(self, **kwargs):
         """Turn Off Siren."""
-        await self._host.api.set_siren(0 if self._channel is None else self._channel, False)
+        if await self._host.async_set_switch("siren", 0 if self._channel is None else self._channel, False):
+            self.async_set_optimistic_state(False)
         await self.request_refresh()
     #endof async_turn_off()
 #endof class SirenSwitch
@@ -506,6 +566,8 @@ class SirenSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 ##########################################################################################################################################################
 class PushSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
+    state_commands = ("GetPush",)
+
     def __init__(self, hass, config, channel: Optional[int] = None):
         ReolinkCoordinatorEntity.__init__(self, hass, config)
         ToggleEntity.__init__(self)
@@ -527,15 +589,17 @@ class PushSwitch(ReolinkCoordinatorEntity, ToggleEntity):
     @property
     def name(self):
         if self._channel is None:
-            return f"{self._host.api.nvr_name} push notifications"
+            return f"{self._host.capabilities.nvr_name} push notifications"
         else:
-            cam_name = self._host.api.camera_name(self._channel)
+            cam_name = self._host.capabilities.camera_name(self._channel)
             return f"{cam_name} push notifications"
     #endof name
 
 
     @property
     def is_on(self):
+        if self._optimistic_state is not None:
+            return self._optimistic_state
         return self._host.api.push_enabled(self._channel)
     #endof is_on
 
@@ -556,14 +620,16 @@ class PushSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
     async def async_turn_on(self, **kwargs):
         """Enable push notifications."""
-        await self._host.api.set_push(self._channel, True)
+        if await self._host.api.set_push(self._channel, True):
+            self.async_set_optimistic_state(True)
         await self.request_refresh()
     #endof async_turn_on()
 
 
     async def async_turn_off(self, **kwargs):
         """Disable push notifications."""
-        await self._host.api.set_push(self._channel, False)
+        if await self._host.api.set_push(self._channel, False):
+            self.async_set_optimistic_state(False)
         await self.request_refresh()
     #endof async_turn_off()
 #endof class PushSwitch
@@ -574,6 +640,8 @@ class PushSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 ##########################################################################################################################################################
 class RecordingSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
+    state_commands = ("GetRec",)
+
     def __init__(self, hass, config, channel: Optional[int] = None):
         ReolinkCoordinatorEntity.__init__(self, hass, config)
         ToggleEntity.__init__(self)
@@ -595,15 +663,17 @@ class RecordingSwitch(ReolinkCoordinatorEntity, ToggleEntity):
     @property
     def name(self):
         if self._channel is None:
-            return f"{self._host.api.nvr_name} recording"
+            return f"{self._host.capabilities.nvr_name} recording"
         else:
-            cam_name = self._host.api.camera_name(self._channel)
+            cam_name = self._host.capabilities.camera_name(self._channel)
             return f"{cam_name} recording"
     #endof name
 
 
     @property
     def is_on(self):
+        if self._optimistic_state is not None:
+            return self._optimistic_state
         return self._host.api.recording_enabled(self._channel)
     #endof is_on
 
@@ -624,14 +694,16 @@ class RecordingSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
     async def async_turn_on(self, **kwargs):
         """Enable recording."""
-        await self._host.api.set_recording(self._channel, True)
+        if await self._host.api.set_recording(self._channel, True):
+            self.async_set_optimistic_state(True)
         await self.request_refresh()
     #endof async_turn_on()
 
 
     async def async_turn_off(self, **kwargs):
         """Disable recording."""
-        await self._host.api.set_recording(self._channel, False)
+        if await self._host.api.set_recording(self._channel, False):
+            self.async_set_optimistic_state(False)
         await self.request_refresh()
     #endof async_turn_off()
 #endof class RecordingSwitch
@@ -642,6 +714,8 @@ class RecordingSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 ##########################################################################################################################################################
 class AudioSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
+    state_commands = ("GetEnc",)
+
     def __init__(self, hass, config, channel: Optional[int] = None):
         ReolinkCoordinatorEntity.__init__(self, hass, config)
         ToggleEntity.__init__(self)
@@ -663,15 +737,17 @@ class AudioSwitch(ReolinkCoordinatorEntity, ToggleEntity):
     @property
     def name(self):
         if self._channel is None:
-            return f"{self._host.api.nvr_name} record audio"
+            return f"{self._host.capabilities.nvr_name} record audio"
         else:
-            cam_name = self._host.api.camera_name(self._channel)
+            cam_name = self._host.capabilities.camera_name(self._channel)
             return f"{cam_name} record audio"
     #endof name
 
 
     @property
     def is_on(self):
+        if self._optimistic_state is not None:
+            return self._optimistic_state
         return self._host.api.audio_state(0 if self._channel is None else self._channel)
     #endof is_on
 
@@ -692,14 +768,16 @@ class AudioSwitch(ReolinkCoordinatorEntity, ToggleEntity):
 
     async def async_turn_on(self, **kwargs):
         """Enable audio recording."""
-        await self._host.api.set_audio(0 if self._channel is None else self._channel, True)
+        if await self._host.api.set_audio(0 if self._channel is None else self._channel, True):
+            self.async_set_optimistic_state(True)
         await self.request_refresh()
     #endof async_turn_on()
 
 
     async def async_turn_off(self, **kwargs):
         """Disable audio recording."""
-        await self._host.api.set_audio(0 if self._channel is None else self._channel, False)
+        if await self._host.api.set_audio(0 if self._channel is None else self._channel, False):
+            self.async_set_optimistic_state(False)
         await self.request_refresh()
     #endof async_turn_off()
 #endof class AudioSwitch
@@ -0,0 +1,336 @@
+"""Store of the VoD thumbnails of a Reolink host, on disk."""
+
+import asyncio
+import datetime as dt
+import logging
+import os
+import time
+
+from typing import Callable, Optional
+
+import  homeassistant.util.dt           as dt_util
+from    homeassistant.core              import CALLBACK_TYPE, HomeAssistant, callback
+from    homeassistant.helpers.event     import async_track_time_interval
+from    homeassistant.helpers.start     import async_at_start
+from    dateutil.relativedelta          import relativedelta
+
+from .const import DOMAIN_DATA, THUMBNAIL_EXTENSION, THUMBNAIL_STORES
+
+_LOGGER         = logging.getLogger(__name__)
+
+PRUNE_INTERVAL  = dt.timedelta(hours = 1)
+
+
+##########################################################################################################################################################
+# Thumbnail store class
+##########################################################################################################################################################
+class ReolinkThumbnailStore:
+    """Thumbnails of the recordings, per channel: "<thumbnail path>/<channel>/<event ID>.jpg".
+
+    The file system is only accessed from the executor: a channel's folder is scanned once into an in-memory index
+    (event ID -> path, modification time, size), which is then kept up-to-date by the store's own changes,
+    and rebuilt by the pruning which runs on a schedule.
+
+    Besides the playback range, the thumbnails are retained within byte quotas (per camera, per host, and across all
+    the hosts), evicting the least recently accessed ones first. Accesses are the thumbnail view's hits; a thumbnail
+    which was never accessed counts as accessed when it got written.
+    """
+
+    def __init__(self, hass: HomeAssistant, host):
+        self._hass                                              = hass
+        self._host                                              = host
+        self._root: Optional[str]                               = None
+        self._index: dict[int, dict[str, tuple[str, float, int]]] = dict()
+        self._accessed: dict[int, dict[str, float]]             = dict()
+        self._locks: dict[int, asyncio.Lock]                    = dict()
+        self._prune_unsub: Optional[CALLBACK_TYPE]              = None
+        self._start_unsub: Optional[CALLBACK_TYPE]              = None
+        self._listeners: list[Callable]                         = list()
+    #endof __init__()
+
+
+    def path(self, channel: int, event_id: str) -> str:
+        """Return the path of the thumbnail of the event (it might not exist)."""
+        return os.path.join(self._host.thumbnail_path, f"{channel}", f"{event_id}.{THUMBNAIL_EXTENSION}")
+    #endof path()
+
+
+    @property
+    def size(self) -> int:
+        """Return the size in bytes of the indexed thumbnails."""
+        return sum(entry[2] for index in self._index.values() for entry in index.values())
+
+    @property
+    def count(self) -> int:
+        """Return the number of indexed thumbnails."""
+        return sum(len(index) for index in self._index.values())
+
+
+    async def async_get_thumbnails(self, channel: int) -> dict[str, tuple[str, float, int]]:
+        """Return the existing thumbnails of the channel: event ID -> (path, modification time, size)."""
+        if self._root != self._host.thumbnail_path:
+            # The path got changed in the options: the known thumbnails are not there.
+            self._root = self._host.thumbnail_path
+            self._index.clear()
+            self._accessed.clear()
+
+        index = self._index.get(channel)
+        if index is None:
+            async with self._locks.setdefault(channel, asyncio.Lock()):
+                index = self._index.get(channel)
+                if index is None:
+                    index = self._index[channel] = await self._hass.async_add_executor_job(self._scan, self._directory(channel), None)
+                    self._notify()
+        return index
+    #endof async_get_thumbnails()
+
+
+    async def async_exists(self, channel: int, event_id: str) -> bool:
+        return event_id in await self.async_get_thumbnails(channel)
+    #endof async_exists()
+
+
+    async def async_prepare(self, channel: int, event_id: str) -> str:
+        """Make sure the channel's folder exists, and return the path to write the thumbnail of the event to."""
+        await self.async_get_thumbnails(channel)
+        await self._hass.async_add_executor_job(self._makedirs, self._directory(channel))
+        return self.path(channel, event_id)
+    #endof async_prepare()
+
+
+    async def async_added(self, channel: int, event_id: str) -> bool:
+        """Index the thumbnail of the event after it got written, and apply the quotas. Returns whether it exists."""
+        path    = self.path(channel, event_id)
+        stat    = await self._hass.async_add_executor_job(self._stat, path)
+        index   = await self.async_get_thumbnails(channel)
+        if stat is None:
+            index.pop(event_id, None)
+            return False
+        index[event_id] = (path, *stat)
+        self._accessed.setdefault(channel, dict()).pop(event_id, None)
+        self._notify()
+
+        await self.async_enforce_quotas()
+        return event_id in index
+    #endof async_added()
+
+
+    @callback
+    def async_accessed(self, channel: int, event_id: str):
+        """Record an access to the thumbnail of the event, for the LRU eviction."""
+        index = self._index.get(channel)
+        if index is not None and event_id in index:
+            self._accessed.setdefault(channel, dict())[event_id] = time.time()
+    #endof async_accessed()
+
+
+    async def async_enforce_quotas(self):
+        """Evict the least recently accessed thumbnails exceeding the camera, host, and global quotas."""
+        for c in self._host.api.channels:
+            await self.async_get_thumbnails(c)
+
+        evicted: list[tuple["ReolinkThumbnailStore", int, str]] = list()
+
+        camera_quota = _megabytes(self._host.thumbnail_camera_quota)
+        if camera_quota:
+            for c in self._host.api.channels:
+                evicted += _over_quota(self._lru(c), camera_quota)
+
+        host_quota = _megabytes(self._host.thumbnail_quota)
+        if host_quota:
+            evicted += _over_quota(self._lru(exclude = evicted), host_quota)
+
+        stores: list[ReolinkThumbnailStore] = self._hass.data.get(DOMAIN_DATA, {}).get(THUMBNAIL_STORES, [])
+        global_quota = min((_megabytes(s._host.thumbnail_global_quota) for s in stores if s._host.thumbnail_global_quota), default = 0)
+        if global_quota:
+            candidates = [e for s in stores for e in s._lru(exclude = evicted)]
+            candidates.sort(key = lambda e: e[0])
+            evicted += _over_quota(candidates, global_quota)
+
+        if not evicted:
+            return
+
+        # Forget them first, so they are not served/counted while being removed.
+        paths = []
+        for store, channel, event_id in evicted:
+            entry = store._index.get(channel, {}).pop(event_id, None)
+            store._accessed.get(channel, {}).pop(event_id, None)
+            if entry is not None:
+                paths.append(entry[0])
+        _LOGGER.debug("Evicting %s thumbnails exceeding the quotas.", len(paths))
+        await self._hass.async_add_executor_job(self._remove, paths)
+
+        for store in {e[0] for e in evicted}:
+            store._notify()
+    #endof async_enforce_quotas()
+
+
+    @callback
+    def async_add_listener(self, action: Callable[[], None]) -> CALLBACK_TYPE:
+        """Register a callback called when the thumbnails changed. Returns the function to remove it."""
+        self._listeners.append(action)
+
+        @callback
+        def remove_listener():
+            if action in self._listeners:
+                self._listeners.remove(action)
+
+        return remove_listener
+    #endof async_add_listener()
+
+
+    async def async_prune(self, channel: Optional[int] = None):
+        """Remove the thumbnails older than the playback range, of one channel or all of them, and rebuild their index."""
+        channels    = [channel] if channel is not None else list(self._host.api.channels)
+        now         = dt_util.now()
+        before      = dt.datetime.combine(now.date(), dt.time.min, now.tzinfo) - relativedelta(days = int(self._host.playback_days))
+        before      = before.timestamp()
+
+        for c in channels:
+            async with self._locks.setdefault(c, asyncio.Lock()):
+                self._index[c] = await self._hass.async_add_executor_job(self._scan, self._directory(c), before)
+                accessed = self._accessed.get(c)
+                if accessed:
+                    self._accessed[c] = {e: t for e, t in accessed.items() if e in self._index[c]}
+        self._notify()
+
+        await self.async_enforce_quotas()
+    #endof async_prune()
+
+
+    @callback
+    def async_start(self):
+        """Start the scheduled pruning."""
+        if self._prune_unsub is None:
+            stores: list = self._hass.data.setdefault(DOMAIN_DATA, {}).setdefault(THUMBNAIL_STORES, [])
+            stores.append(self)
+            self._prune_unsub = async_track_time_interval(self._hass, self._async_scheduled_prune, PRUNE_INTERVAL)
+            # Not needed for the startup, so not competing with it.
+            self._start_unsub = async_at_start(self._hass, self._async_scheduled_prune)
+    #endof async_start()
+
+
+    @callback
+    def async_stop(self):
+        if self._start_unsub is not None:
+            self._start_unsub()
+            self._start_unsub = None
+        if self._prune_unsub is not None:
+            self._prune_unsub()
+            self._prune_unsub = None
+            stores: list = self._hass.data.get(DOMAIN_DATA, {}).get(THUMBNAIL_STORES, [])
+            if self in stores:
+                stores.remove(self)
+    #endof async_stop()
+
+
+    async def _async_scheduled_prune(self, now = None):
+        await self.async_prune()
+    #endof _async_scheduled_prune()
+
+
+    def _directory(self, channel: int) -> str:
+        return os.path.join(self._host.thumbnail_path, f"{channel}")
+    #endof _directory()
+
+
+    def _lru(self, channel: Optional[int] = None, exclude: list = ()) -> list[tuple[float, int, "ReolinkThumbnailStore", int, str]]:
+        """Return (last access, size, store, channel, event ID) of the thumbnails of one channel or all of them, least recently accessed first."""
+        excluded    = set(exclude)
+        entries     = []
+        for c, index in self._index.items():
+            if channel is not None and c != channel:
+                continue
+            accessed = self._accessed.get(c, {})
+            for event_id, (_, mtime, size) in index.items():
+                if (self, c, event_id) not in excluded:
+                    entries.append((accessed.get(event_id, mtime), size, self, c, event_id))
+        entries.sort(key = lambda e: e[0])
+        return entries
+    #endof _lru()
+
+
+    def _notify(self):
+        for action in self._listeners:
+            action()
+    #endof _notify()
+
+
+    ##############################################################################
+    # Executor jobs
+    @staticmethod
+    def _scan(directory: str, before: Optional[float]) -> dict[str, tuple[str, float, int]]:
+        index   = dict()
+        suffix  = f".{THUMBNAIL_EXTENSION}"
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            return index
+
+        with entries:
+            for entry in entries:
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat    = entry.stat()
+                    mtime   = stat.st_mtime
+                    if before is not None and mtime < before:
+                        os.remove(entry.path)
+                        continue
+                except OSError as e:
+                    _LOGGER.warning("Unable to process the thumbnail %s: %s", entry.path, e)
+                    continue
+                if entry.name.endswith(suffix):
+                    index[entry.name[:-len(suffix)]] = (entry.path, mtime, stat.st_size)
+        return index
+    #endof _scan()
+
+
+    @staticmethod
+    def _makedirs(directory: str):
+        os.makedirs(directory, exist_ok = True)
+    #endof _makedirs()
+
+
+    @staticmethod
+    def _stat(path: str) -> Optional[tuple[float, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+    #endof _stat()
+
+
+    @staticmethod
+    def _remove(paths: list[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                _LOGGER.warning("Unable to remove the thumbnail %s: %s", path, e)
+    #endof _remove()
+#endof class ReolinkThumbnailStore
+
+
+##########################################################################################################################################################
+# Globals
+##########################################################################################################################################################
+def _megabytes(value: Optional[int]) -> int:
+    return int(value) * 1024 * 1024 if value else 0
+#endof _megabytes()
+
+
+def _over_quota(entries: list[tuple[float, int, ReolinkThumbnailStore, int, str]], quota: int) -> list[tuple[ReolinkThumbnailStore, int, str]]:
+    """Return the least recently accessed entries to evict, for the rest to fit in the quota."""
+    total   = sum(e[1] for e in entries)
+    evicted = []
+    for _, size, store, channel, event_id in entries:
+        if total <= quota:
+            break
+        total -= size
+        evicted.append((store, channel, event_id))
+    return evicted
+#endof _over_quota()
@@ -0,0 +1,96 @@
+"""Access tokens of the media views of the integration (thumbnails and VoD links)."""
+
+import secrets
+import time
+
+from collections    import OrderedDict
+from typing         import Optional
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DOMAIN_DATA,
+    LONG_TOKEN_LIFETIME,
+    LONG_TOKEN_RENEWAL,
+    LONG_TOKENS,
+    MEDIA_SOURCE,
+    SHORT_TOKEN_LIFETIME,
+    SHORT_TOKEN_RENEWAL,
+    SHORT_TOKENS,
+    TOKENS_MAX,
+)
+
+TOKEN_LIFETIMES = {
+    SHORT_TOKENS:   (SHORT_TOKEN_LIFETIME, SHORT_TOKEN_RENEWAL),
+    LONG_TOKENS:    (LONG_TOKEN_LIFETIME, LONG_TOKEN_RENEWAL),
+}
+
+
+##########################################################################################################################################################
+# Tokens class
+##########################################################################################################################################################
+class ReolinkTokens:
+    """Tokens valid for a fixed lifetime, the current one being replaced once it is older than the renewal delay.
+
+    A URL handed out just before a renewal thus stays valid for at least (lifetime - renewal).
+    Expired tokens are dropped when met (checked, or when a token is issued) rather than by timers,
+    and only the most recent ones are kept.
+    """
+
+    def __init__(self, lifetime: float, renewal: float, max_size: int = TOKENS_MAX):
+        self._lifetime                              = lifetime
+        self._renewal                               = renewal
+        self._max_size                              = max_size
+        # Token -> expiry (monotonic time), oldest first.
+        self._tokens: OrderedDict[str, float]       = OrderedDict()
+        self._current: Optional[str]                = None
+        self._renew_at: float                       = 0.0
+    #endof __init__()
+
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+
+    def current(self) -> str:
+        """Return the token to hand out, issuing a new one when the current one is due for renewal."""
+        now = time.monotonic()
+        if self._current is None or now >= self._renew_at or self._current not in self._tokens:
+            self._current   = secrets.token_hex()
+            self._renew_at  = now + self._renewal
+            self._tokens[self._current] = now + self._lifetime
+            self._prune(now)
+        return self._current
+    #endof current()
+
+
+    def valid(self, token: Optional[str]) -> bool:
+        if not token:
+            return False
+        expiry = self._tokens.get(token)
+        if expiry is None:
+            return False
+        if expiry <= time.monotonic():
+            del self._tokens[token]
+            return False
+        return True
+    #endof valid()
+
+
+    def _prune(self, now: float):
+        while self._tokens and (len(self._tokens) > self._max_size or next(iter(self._tokens.values())) <= now):
+            self._tokens.popitem(last = False)
+    #endof _prune()
+#endof class ReolinkTokens
+
+
+@callback
+def async_get_tokens(hass: HomeAssistant, kind: str) -> ReolinkTokens:
+    """Return the tokens of a kind (SHORT_TOKENS or LONG_TOKENS), shared by all the entries."""
+    data: dict = hass.data.setdefault(DOMAIN_DATA, {})
+    data = data.setdefault(MEDIA_SOURCE, {})
+    tokens = data.get(kind)
+    if tokens is None:
+        tokens = data[kind] = ReolinkTokens(*TOKEN_LIFETIMES[kind])
+    return tokens
+#endof async_get_tokens()
@@ -0,0 +1,170 @@
+"""Persistent index of the VoD recordings of a Reolink host."""
+
+import asyncio
+import datetime as dt
+import logging
+
+from typing import Optional
+
+import  homeassistant.util.dt           as dt_util
+from    homeassistant.core              import HomeAssistant
+from    homeassistant.helpers.storage   import Store
+
+from reolink_ip.typings import SearchFile
+
+from .const import VOD_INDEX_STORAGE_KEY
+
+_LOGGER             = logging.getLogger(__name__)
+
+STORAGE_VERSION     = 1
+STORAGE_SAVE_DELAY  = 10
+SUMMARY_SEARCHES    = 4     # Concurrent searches per host, when refreshing the summaries.
+
+
+##########################################################################################################################################################
+# VoD index class
+##########################################################################################################################################################
+class ReolinkVoDIndex:
+    """Index of recorded days and files per channel, stored on disk.
+
+    Days which are over can not get new recordings, so their status and file lists are searched on the device only once.
+    Only "today" is searched again, and incrementally: from the start of its last known file.
+    """
+
+    def __init__(self, hass: HomeAssistant, host):
+        self._hass                                      = hass
+        self._host                                      = host
+        self._store                                     = Store(hass, STORAGE_VERSION, VOD_INDEX_STORAGE_KEY.format(unique_id = host.unique_id))
+        self._data: Optional[dict[str, dict]]           = None
+        self._load_lock                                 = asyncio.Lock()
+        self._today_files: dict[int, tuple[dt.date, list[SearchFile]]] = dict()
+    #endof __init__()
+
+
+    async def async_get_days(self, channel: int, start: dt.date) -> list[dt.date]:
+        """Return the days (starting from the given one) having recordings, in chronological order."""
+        entry   = await self._async_channel_entry(channel)
+        now     = dt_util.now()
+        today   = now.date()
+        self._prune(entry, start)
+
+        # All days before the "checked" one are over, and were searched after they had finished.
+        checked     = dt.date.fromisoformat(entry["checked"]) if entry["checked"] else None
+        query_start = start if checked is None or checked < start else checked
+
+        search, _ = await self._host.async_search_vod_files(channel, dt.datetime.combine(query_start, dt.time.min, now.tzinfo), now, True)
+        if search is not None:
+            days = {d for d in entry["days"] if d < query_start.isoformat()}
+            for status in search:
+                for day, flag in enumerate(status["table"], start = 1):
+                    if flag == "1":
+                        days.add(dt.date(status["year"], status["mon"], day).isoformat())
+
+            entry["days"]       = sorted(days)
+            entry["checked"]    = today.isoformat()
+            self._schedule_save()
+
+        return [dt.date.fromisoformat(d) for d in entry["days"] if d >= start.isoformat()]
+    #endof async_get_days()
+
+
+    async def async_get_files(self, channel: int, day: dt.date) -> list[SearchFile]:
+        """Return the recorded files of the day, in chronological order."""
+        entry   = await self._async_channel_entry(channel)
+        now     = dt_util.now()
+        key     = day.isoformat()
+
+        if day < now.date():
+            files = entry["files"].get(key)
+            if files is None:
+                end         = dt.datetime.combine(day, dt.time.max, now.tzinfo)
+                _, files    = await self._host.async_search_vod_files(channel, dt.datetime.combine(day, dt.time.min, now.tzinfo), end)
+                if files is None:
+                    return []
+                entry["files"][key] = files
+                self._schedule_save()
+            return files
+
+        cached  = self._today_files.get(channel)
+        known   = cached[1] if cached is not None and cached[0] == day else []
+        if known:
+            # The last known file could still be recording: search again from its start, and replace it.
+            last_start  = known[-1]["StartTime"]
+            start       = dt.datetime(last_start["year"], last_start["mon"], last_start["day"], last_start["hour"], last_start["min"], last_start["sec"], tzinfo = now.tzinfo)
+        else:
+            start       = dt.datetime.combine(day, dt.time.min, now.tzinfo)
+
+        _, files = await self._host.async_search_vod_files(channel, start, now)
+        if files is None:
+            return known
+
+        files = known[:-1] + files if known else files
+        self._today_files[channel] = (day, files)
+        return files
+    #endof async_get_files()
+
+
+    def summary(self, channel: int) -> Optional[dict]:
+        """Return what is known of the channel's recordings, without searching: recorded days, last one, and today's file count.
+
+        The file count is None when today's files were not searched yet.
+        """
+        entry = self._data.get(str(channel)) if self._data is not None else None
+        if entry is None:
+            return None
+
+        today   = dt_util.now().date()
+        last    = entry["days"][-1] if entry["days"] else None
+        cached  = self._today_files.get(channel)
+        if cached is not None and cached[0] == today:
+            count = len(cached[1])
+        else:
+            count = None if last == today.isoformat() else 0
+        return {"days": len(entry["days"]), "last": last, "today": count}
+    #endof summary()
+
+
+    async def async_refresh_summaries(self):
+        """Search the recorded days of every channel, and today's files of the channels which recorded today."""
+        today       = dt_util.now().date()
+        start       = today - dt.timedelta(days = int(self._host.playback_days)) if self._host.playback_days > 0 else today
+        semaphore   = asyncio.Semaphore(SUMMARY_SEARCHES)
+
+        async def async_refresh_channel(channel: int):
+            async with semaphore:
+                days = await self.async_get_days(channel, start)
+                if days and days[-1] == today:
+                    await self.async_get_files(channel, today)
+
+        # The channels concurrently (a few at a time, not to flood the device), so the caller's timeout bounds the host as a whole.
+        await asyncio.gather(*[async_refresh_channel(channel) for channel in self._host.capabilities.channels])
+    #endof async_refresh_summaries()
+
+
+    async def _async_channel_entry(self, channel: int) -> dict:
+        if self._data is None:
+            async with self._load_lock:
+                if self._data is None:
+                    data = await self._store.async_load()
+                    self._data = data if isinstance(data, dict) else dict()
+
+        return self._data.setdefault(str(channel), {"checked": None, "days": [], "files": {}})
+    #endof _async_channel_entry()
+
+
+    def _prune(self, entry: dict, start: dt.date):
+        """Forget the days which are out of the playback range."""
+        start = start.isoformat()
+        if entry["days"] and entry["days"][0] < start:
+            entry["days"] = [d for d in entry["days"] if d >= start]
+            self._schedule_save()
+        for key in [k for k in entry["files"] if k < start]:
+            del entry["files"][key]
+            self._schedule_save()
+    #endof _prune()
+
+
+    def _schedule_save(self):
+        self._store.async_delay_save(lambda: self._data, STORAGE_SAVE_DELAY)
+    #endof _schedule_save()
+#endof class ReolinkVoDIndex
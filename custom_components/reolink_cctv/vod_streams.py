@@ -0,0 +1,125 @@
+"""Registry of the VoD playback streams of a Reolink host."""
+
+import asyncio
+import logging
+import time
+
+from dataclasses import dataclass
+
+from homeassistant.components.stream        import Stream, create_stream
+from homeassistant.components.stream.const  import HLS_PROVIDER
+from homeassistant.core                     import HomeAssistant
+
+from .const import VOD_STREAM_IDLE_TIMEOUT, VOD_STREAMS_PER_HOST
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class VoDStream:
+    """A VoD recording being streamed as HLS."""
+
+    stream: Stream
+    mime_type: str
+    url: str
+    resolutions: int        = 0
+    last_resolved: float    = 0.0
+#endof class VoDStream
+
+
+##########################################################################################################################################################
+# VoD streams class
+##########################################################################################################################################################
+class ReolinkVoDStreams:
+    """HLS streams of the VoD recordings of a host, per (channel, file).
+
+    A recording played again, or by several viewers, reuses its running stream instead of starting another ffmpeg worker.
+    A stream stops once no viewer requested it for a short idle timeout (the HLS provider's one), and at most a few
+    streams run at once, as the devices only allow a few playback sessions. For a new one, a stream which was not resolved
+    within the idle timeout is stopped first, as its viewers probably left; if all of them were resolved recently, the least
+    recently resolved one is stopped anyway, which can interrupt a playback still in progress.
+    """
+
+    def __init__(self, hass: HomeAssistant, host):
+        self._hass                                  = hass
+        self._host                                  = host
+        self._streams: dict[tuple, VoDStream]       = dict()
+        self._lock                                  = asyncio.Lock()
+    #endof __init__()
+
+
+    def summary(self) -> list[dict]:
+        """Return the running streams: their recording, how many times they got resolved, and since when."""
+        self._prune()
+        now = time.monotonic()
+        return [
+            {"channel": channel, "file": file, "resolutions": entry.resolutions, "since_resolved": round(now - entry.last_resolved)}
+            for (channel, file), entry in self._streams.items()
+        ]
+    #endof summary()
+
+
+    async def async_resolve(self, channel: int, file: str) -> tuple[str, str]:
+        """Return the MIME type and the HLS URL of the stream of the recording, starting it if it does not run."""
+        key = (channel, file)
+        async with self._lock:
+            self._prune()
+
+            entry = self._streams.get(key)
+            if entry is None:
+                while len(self._streams) >= VOD_STREAMS_PER_HOST:
+                    lru = min(self._streams, key = lambda k: self._streams[k].last_resolved)
+                    if time.monotonic() - self._streams[lru].last_resolved < VOD_STREAM_IDLE_TIMEOUT:
+                        _LOGGER.debug("Host %s: stopping the VoD stream of %s, still possibly played, to start another one.", self._host.api.host, lru)
+                    else:
+                        _LOGGER.debug("Host %s: stopping the VoD stream of %s, to start another one.", self._host.api.host, lru)
+                    await _async_stop(self._streams.pop(lru).stream)
+
+                mime_type, url  = await self._host.async_get_vod_source(channel, file)
+                stream          = await self._async_create_stream(channel, url)
+                stream.add_provider(HLS_PROVIDER, timeout = VOD_STREAM_IDLE_TIMEOUT)
+                entry           = self._streams[key] = VoDStream(stream, mime_type, stream.endpoint_url(HLS_PROVIDER))
+
+            entry.resolutions       += 1
+            entry.last_resolved     = time.monotonic()
+            return entry.mime_type, entry.url
+    #endof async_resolve()
+
+
+    async def async_stop(self):
+        """Stop all the streams."""
+        async with self._lock:
+            streams         = self._streams
+            self._streams   = dict()
+            for entry in streams.values():
+                await _async_stop(entry.stream)
+    #endof async_stop()
+
+
+    def _prune(self):
+        """Forget the streams which stopped (their HLS provider got removed when it idled)."""
+        for key in [k for k, entry in self._streams.items() if HLS_PROVIDER not in entry.stream.outputs()]:
+            del self._streams[key]
+    #endof _prune()
+
+
+    async def _async_create_stream(self, channel: int, url: str) -> Stream:
+        try:
+            from homeassistant.components.camera import DynamicStreamSettings
+            from homeassistant.components.camera import CameraPreferences
+            from homeassistant.components.camera import DATA_CAMERA_PREFS
+            prefs: CameraPreferences = self._hass.data[DATA_CAMERA_PREFS]
+            stream_prefs: DynamicStreamSettings = await prefs.get_dynamic_stream_settings(self._host.cameras[channel].entity_id)
+            return create_stream(self._hass, url, {}, dynamic_stream_settings = stream_prefs)
+        except ImportError: #ModuleNotFoundError:
+            return create_stream(self._hass, url, {})
+    #endof _async_create_stream()
+#endof class ReolinkVoDStreams
+
+
+async def _async_stop(stream: Stream):
+    # Stream.stop() became a coroutine in later Home Assistant versions.
+    result = stream.stop()
+    if asyncio.iscoroutine(result):
+        await result
+#endof _async_stop()